@@ -1,9 +1,13 @@
+import json
+
 import streamlit as st
-import os
-import tempfile
-import shutil
-from pathlib import Path
-from src.agent.graph import SharedState, graph
+from src.agent import nodes
+from src.agent.batch import initial_state, to_record
+from src.agent.graph import build_graph
+from src.agent.pdf import register_cv
+from src.agent.jd import register_jd
+from src.agent.metrics import track_run
+from src.agent.results import ResultStore, ScreeningResult
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +16,180 @@ st.set_page_config(
     layout="wide"
 )
 
+
+# Shared by every session and rerun of this server process
+@st.cache_resource
+def load_graph():
+    return build_graph()
+
+
+@st.cache_resource
+def load_llm():
+    return nodes.get_llm()
+
+
+@st.cache_resource
+def load_result_store():
+    """Past results keyed by (JD id, PDF hash); None when RESULTS_DB_PATH is empty"""
+    return ResultStore.from_env()
+
+
+def stored_result(store, jd_id, cv_hash):
+    """A complete earlier result of this CV for this JD, if any"""
+    record = store.get(jd_id, cv_hash) if store is not None else None
+    if record is None or record.get("status") != "ok" or not record.get("final_decision"):
+        return None
+    return record
+
+
+def render_candidate(box, result):
+    with box.container():
+        st.subheader("📋 Candidate Information")
+        st.write(f"**Name:** {result['name']}")
+        st.write(f"**Email:** {result['email']}")
+        st.write(f"**Phone:** {result['phone']}")
+        st.write(f"**Experience:** {result['years_of_experience']} years")
+        
+        st.subheader("🎯 Skills")
+        skills = result['skills']
+        if isinstance(skills, list):
+            for skill in skills:
+                st.write(f"• {skill}")
+        else:
+            st.write(skills)
+
+
+def render_decision(box, result, final):
+    with box.container():
+        st.subheader("📊 Analysis Results")
+        st.write(f"**Pre-screening Status:** {result['pre_screening_status']}")
+        st.write(f"**Final Decision:** {result['final_decision'] if final else '⏳ pending'}")
+
+
+def render_skills_analysis(box, skills_analysis):
+    with box.container():
+        st.subheader("🔍 Skills Analysis")
+        
+        # Score with progress bar
+        score = skills_analysis.get('score', 0)
+        st.metric("Overall Score", f"{score}/100")
+        st.progress(score / 100)
+        
+        # Skills breakdown
+        if skills_analysis.get('matched'):
+            st.write("**✅ Matched Skills:**")
+            for skill in skills_analysis['matched']:
+                st.write(f"• {skill}")
+        
+        if skills_analysis.get('missing'):
+            st.write("**❌ Missing Skills:**")
+            for skill in skills_analysis['missing']:
+                st.write(f"• {skill}")
+        
+        if skills_analysis.get('additional'):
+            st.write("**➕ Additional Skills:**")
+            for skill in skills_analysis['additional']:
+                st.write(f"• {skill}")
+
+
+def render_rejection_reason(box, reason):
+    with box.container():
+        st.subheader("📝 Rejection Reason")
+        st.warning(reason)
+
+
+def render_metrics(box, run_metrics):
+    with box.container():
+        st.subheader("⏱️ Performance")
+        summary = run_metrics.summary()
+        st.dataframe([
+            {
+                "Node": node,
+                "Time (s)": stats["seconds_total"],
+                "LLM calls": stats["llm_calls"],
+                "Cache hits": stats["llm_cache_hits"],
+                "Retries": stats["llm_retries"],
+                "Prompt tokens": stats["prompt_tokens"],
+                "Cached prompt tokens": stats["cached_prompt_tokens"],
+                "Completion tokens": stats["completion_tokens"],
+                "Cost ($)": stats["cost_usd"],
+            }
+            for node, stats in summary["nodes"].items()
+        ], use_container_width=True)
+        st.caption(f"Total cost: ${summary['total']['cost_usd']:.6f}")
+
+
+def progress_row(file_name, status, record=None):
+    row = {"File": file_name, "Status": status, "Name": "", "Decision": "", "Score": None}
+    if record is not None:
+        row.update(Name=record.name or "", Decision=record.final_decision or "", Score=record.score)
+        if record.status == "error":
+            row.update(Status="❌ error", Decision=record.error)
+    return row
+
+
+def screen_many(uploaded_files, jd_id, store, max_concurrency, reuse_results=True):
+    """
+    Screen several uploads concurrently, refreshing a progress table as each one finishes.
+    With `reuse_results`, CVs with a stored result for this JD are not screened again.
+    Returns one record per upload.
+    """
+    table = st.empty()
+    records = [None] * len(uploaded_files)
+    rows = [progress_row(f.name, "⏳ queued") for f in uploaded_files]
+    indices, inputs = [], []
+    for i, uploaded_file in enumerate(uploaded_files):
+        try:
+            cv_hash = register_cv(uploaded_file.getvalue())
+        except Exception as e:
+            records[i] = ScreeningResult.from_error(uploaded_file.name, e, jd_id)
+            rows[i] = progress_row(uploaded_file.name, "❌ error", records[i])
+            continue
+        cached = stored_result(store, jd_id, cv_hash) if reuse_results else None
+        if cached is not None:
+            records[i] = ScreeningResult(**{**cached, "file": uploaded_file.name})
+            rows[i] = progress_row(uploaded_file.name, "♻️ cached", records[i])
+            continue
+        indices.append(i)
+        inputs.append(initial_state(jd_id, cv_hash))
+        rows[i]["Status"] = "🔄 screening"
+    table.dataframe(rows, use_container_width=True)
+
+    screened = []
+    if inputs:
+        configs = [{"max_concurrency": max_concurrency} for _ in inputs]
+        for pos, result in load_graph().batch_as_completed(inputs, configs, return_exceptions=True):
+            i = indices[pos]
+            records[i] = to_record(uploaded_files[i].name, result, jd_id)
+            screened.append(records[i])
+            rows[i] = progress_row(uploaded_files[i].name, "✅ done", records[i])
+            table.dataframe(rows, use_container_width=True)
+    if store is not None and screened:
+        store.put_many(screened)
+    return records
+
+
+def render_comparison(box, records):
+    ranked = sorted(records, key=lambda r: r.score if r.score is not None else -1, reverse=True)
+    with box.container():
+        st.subheader("🏆 Candidates by Score")
+        st.dataframe([
+            {
+                "File": r.file,
+                "Name": r.name or "",
+                "Experience (years)": r.years_of_experience,
+                "Pre-screening": r.pre_screening_status or "",
+                "Decision": r.final_decision or r.status,
+                "Score": r.score,
+            }
+            for r in ranked
+        ], use_container_width=True)
+        for r in ranked:
+            if r.rejection_reason:
+                with st.expander(f"📝 {r.name or r.file}: rejection reason"):
+                    st.write(r.rejection_reason)
+
+
 def main():
     st.title("📄 CV Analysis Agent")
     st.markdown("Upload your CV (PDF) and provide a job description to get an AI-powered analysis.")
@@ -21,10 +199,11 @@ def main():
         st.header("Inputs")
         
         # File upload for CV
-        uploaded_file = st.file_uploader(
-            "Upload your CV (PDF)",
+        uploaded_files = st.file_uploader(
+            "Upload CVs (PDF)",
             type=['pdf'],
-            help="Upload your CV in PDF format"
+            accept_multiple_files=True,
+            help="Upload one CV in PDF format, or several to compare them"
         )
         
         # Text area for job description
@@ -35,106 +214,116 @@ def main():
             help="Enter or paste the complete job description"
         )
         
+        show_metrics = st.checkbox("Show performance metrics", value=False)
+        reuse_results = st.checkbox(
+            "Reuse previous results",
+            value=True,
+            help="Show the stored result when this CV was already analyzed against this job description"
+        )
+        max_concurrency = st.slider("Concurrent analyses", min_value=1, max_value=16, value=4,
+                                    help="CVs screened at the same time when several are uploaded")
+        
         # Analysis button
         analyze_button = st.button("🚀 Analyze CV", type="primary", use_container_width=True)
     
     # Main content area
-    if uploaded_file is not None and jd_text.strip():
+    if uploaded_files and jd_text.strip():
         st.success("✅ Both CV and job description are ready!")
         
-        if analyze_button:
-            with st.spinner("Analyzing your CV..."):
+        if analyze_button and len(uploaded_files) > 1:
+            with st.spinner(f"Analyzing {len(uploaded_files)} CVs..."), track_run() as run_metrics:
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_file_path = tmp_file.name
+                    load_llm()
+                    records = screen_many(uploaded_files, register_jd(jd_text), load_result_store(),
+                                          max_concurrency, reuse_results)
+                    render_comparison(st.empty(), records)
+                    if show_metrics:
+                        render_metrics(st.empty(), run_metrics)
                     
-                    try:
-                        # Create initial state
-                        initial_state = {
-                            "name": "",
-                            "email": "",
-                            "phone": "",
-                            "years_of_experience": 0,
-                            "skills": [],
-                            "pre_screening_status": "Fail",
-                            "skills_analysis": {
-                                "matched": [],
-                                "missing": [],
-                                "additional": [],
-                                "score": 0.0
-                            },
-                            "final_decision": "Rejected",
-                            "rejection_reason": "",
-                            "jd_text": jd_text,
-                            "cv_file_path": tmp_file_path
-                        }
-                        
-                        # Run the analysis using the graph
-                        shared_state = SharedState(**initial_state)
-                        result = graph.invoke(shared_state)
-                        
-                        # Display results
-                        st.success("Analysis Complete! 🎉")
-                        
-                        # Create columns for better layout
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.subheader("📋 Candidate Information")
-                            st.write(f"**Name:** {result['name']}")
-                            st.write(f"**Email:** {result['email']}")
-                            st.write(f"**Phone:** {result['phone']}")
-                            st.write(f"**Experience:** {result['years_of_experience']} years")
-                            
-                            st.subheader("🎯 Skills")
-                            skills = result['skills']
-                            if isinstance(skills, list):
-                                for skill in skills:
-                                    st.write(f"• {skill}")
-                            else:
-                                st.write(skills)
-                        
-                        with col2:
-                            st.subheader("📊 Analysis Results")
-                            st.write(f"**Pre-screening Status:** {result['pre_screening_status']}")
-                            st.write(f"**Final Decision:** {result['final_decision']}")
-                            
-                            # Skills analysis
-                            if result.get('skills_analysis'):
-                                skills_analysis = result['skills_analysis']
-                                st.subheader("🔍 Skills Analysis")
-                                
-                                # Score with progress bar
-                                score = skills_analysis.get('score', 0)
-                                st.metric("Overall Score", f"{score}/100")
-                                st.progress(score / 100)
-                                
-                                # Skills breakdown
-                                if skills_analysis.get('matched'):
-                                    st.write("**✅ Matched Skills:**")
-                                    for skill in skills_analysis['matched']:
-                                        st.write(f"• {skill}")
-                                
-                                if skills_analysis.get('missing'):
-                                    st.write("**❌ Missing Skills:**")
-                                    for skill in skills_analysis['missing']:
-                                        st.write(f"• {skill}")
-                                
-                                if skills_analysis.get('additional'):
-                                    st.write("**➕ Additional Skills:**")
-                                    for skill in skills_analysis['additional']:
-                                        st.write(f"• {skill}")
+                    st.subheader("💾 Download Results")
+                    st.download_button(
+                        label="📥 Download Results as JSON Lines",
+                        data="".join(json.dumps(r.to_dict(), ensure_ascii=False) + "\n" for r in records),
+                        file_name="cv_analysis_results.jsonl",
+                        mime="application/jsonl"
+                    )
+                    
+                except Exception as e:
+                    st.error(f"❌ Error during analysis: {str(e)}")
+                    st.info("Please check your inputs and try again.")
+        
+        elif analyze_button:
+            uploaded_file = uploaded_files[0]
+            with st.spinner("Analyzing your CV..."), track_run() as run_metrics:
+                try:
+                    load_llm()
+                    store = load_result_store()
+                    
+                    # Extract the CV straight from the upload buffer (cached by content hash)
+                    cv_hash = register_cv(uploaded_file.getvalue())
+                    jd_id = register_jd(jd_text)
+                    
+                    status_box = st.empty()
+                    col1, col2 = st.columns(2)
+                    candidate_box = col1.empty()
+                    decision_box = col2.empty()
+                    skills_box = col2.empty()
+                    reason_box = st.empty()
+                    
+                    cached = stored_result(store, jd_id, cv_hash) if reuse_results else None
+                    if cached is not None:
+                        result = cached
+                        render_candidate(candidate_box, result)
+                        render_decision(decision_box, result, final=True)
+                        if result.get("skills_analysis"):
+                            render_skills_analysis(skills_box, result["skills_analysis"])
+                        if result.get("rejection_reason"):
+                            render_rejection_reason(reason_box, result["rejection_reason"])
+                        status_box.info("Loaded from an earlier analysis of this CV against this job description ♻️")
+                    else:
+                        # Run the analysis using the graph, rendering each node's output as soon as it finishes
+                        shared_state = initial_state(jd_id, cv_hash)
+                        result = dict(shared_state)
+                        reason_tokens = []
+                        for mode, payload in load_graph().stream(shared_state, stream_mode=["updates", "messages"]):
+                            if mode == "messages":
+                                # Only the rejection letter is prose worth streaming token by token
+                                chunk, metadata = payload
+                                if metadata.get("langgraph_node") == "reject" and chunk.content:
+                                    reason_tokens.append(str(chunk.content))
+                                    render_rejection_reason(reason_box, "".join(reason_tokens))
+                                continue
                         
-                        # Rejection reason if applicable
-                        if result.get('rejection_reason'):
-                            st.subheader("📝 Rejection Reason")
-                            st.warning(result['rejection_reason'])
+                            for node, update in payload.items():
+                                if not update:
+                                    continue
+                                result.update(update)
+                                if node == "knockout_filter":
+                                    # Nothing to show yet; a knockout renders with `reject`
+                                    continue
+                                elif node == "prescreening_analysis":
+                                    render_candidate(candidate_box, result)
+                                    render_decision(decision_box, result, final=False)
+                                elif node == "skills_analysis":
+                                    render_skills_analysis(skills_box, result["skills_analysis"])
+                                elif node == "fused_screening":
+                                    render_candidate(candidate_box, result)
+                                    render_decision(decision_box, result, final=False)
+                                    render_skills_analysis(skills_box, result["skills_analysis"])
+                                else:
+                                    render_decision(decision_box, result, final=True)
+                                    if result.get("rejection_reason"):
+                                        render_rejection_reason(reason_box, result["rejection_reason"])
                         
-                        # Download results
-                        st.subheader("💾 Download Results")
-                        results_text = f"""
+                        status_box.success("Analysis Complete! 🎉")
+                        if store is not None:
+                            store.put_many([ScreeningResult.from_state(uploaded_file.name, result, jd_id)])
+                    if show_metrics:
+                        render_metrics(st.empty(), run_metrics)
+                    
+                    # Download results
+                    st.subheader("💾 Download Results")
+                    results_text = f"""
 CV Analysis Results
 
 Candidate: {result['name']}
@@ -155,24 +344,19 @@ Skills Analysis:
 
 Rejection Reason: {result.get('rejection_reason', 'N/A')}
 """
-                        
-                        st.download_button(
-                            label="📥 Download Results as Text",
-                            data=results_text,
-                            file_name=f"cv_analysis_{result['name'].replace(' ', '_')}.txt",
-                            mime="text/plain"
-                        )
-                        
-                    finally:
-                        # Clean up temporary file
-                        if os.path.exists(tmp_file_path):
-                            os.unlink(tmp_file_path)
-                            
+                    
+                    st.download_button(
+                        label="📥 Download Results as Text",
+                        data=results_text,
+                        file_name=f"cv_analysis_{result['name'].replace(' ', '_')}.txt",
+                        mime="text/plain"
+                    )
+                    
                 except Exception as e:
                     st.error(f"❌ Error during analysis: {str(e)}")
                     st.info("Please check your inputs and try again.")
     
-    elif uploaded_file is not None:
+    elif uploaded_files:
         st.warning("⚠️ Please provide a job description to continue.")
     elif jd_text.strip():
         st.warning("⚠️ Please upload a CV (PDF) to continue.")
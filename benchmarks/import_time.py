@@ -0,0 +1,86 @@
+"""
+Import-time benchmark for the modules loaded on every Streamlit rerun and server worker start.
+
+Each measurement runs in a fresh interpreter with networking disabled, so it
+also proves the graph module imports offline.
+
+Usage:
+    python -m benchmarks.import_time [--runs 5] [--module src.agent.graph] [--json out.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = ["src.agent.graph", "src.agent.nodes"]
+
+# Fail loudly on any socket use during import
+_NO_NETWORK = (
+    "import socket\n"
+    "def _blocked(*a, **k):\n"
+    "    raise RuntimeError('network access during import')\n"
+    "socket.socket.connect = _blocked\n"
+    "socket.create_connection = _blocked\n"
+    "socket.getaddrinfo = _blocked\n"
+)
+
+
+def measure(module: str) -> tuple[float, list[tuple[int, str]]]:
+    """Wall time of `import module` in a fresh interpreter, plus the slowest imports by cumulative time"""
+    code = _NO_NETWORK + f"import time\nt = time.perf_counter()\nimport {module}\nprint(time.perf_counter() - t)\n"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    import_seconds = float(proc.stdout.strip().splitlines()[-1])
+
+    slowest: list[tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        slowest.append((int(cumulative), name.strip()))
+    slowest.sort(reverse=True)
+    return import_seconds, slowest[:10]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the agent modules.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", action="append", help="Module to import (repeatable)")
+    parser.add_argument("--json", help="Write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for module in args.module or DEFAULT_MODULES:
+        timings = []
+        slowest: list[tuple[int, str]] = []
+        for _ in range(args.runs):
+            seconds, slowest = measure(module)
+            timings.append(seconds)
+        results[module] = {
+            "runs": args.runs,
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings),
+            "slowest_imports_us": [{"module": name, "cumulative_us": us} for us, name in slowest],
+        }
+        print(f"{module}: median {results[module]['median_s'] * 1000:.0f} ms "
+              f"(min {results[module]['min_s'] * 1000:.0f}, max {results[module]['max_s'] * 1000:.0f}, {args.runs} runs)")
+        for us, name in slowest[:5]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Offline end-to-end benchmark of the screening pipeline.
+
+The Groq client is replaced by `FakeChatModel`, a deterministic stand-in with a
+configurable latency that returns canned JSON for every prompt, and the CVs are
+synthetic PDFs generated from the texts in `src/agent/examples.py`. Caches live
+in a temporary directory, so every run starts cold and no API key is needed.
+
+Measures PDF extraction speed, per-node latency, graph throughput at several
+concurrency levels and the memory peak; `--json` saves the results so they can
+be compared between commits.
+
+Usage:
+    python -m benchmarks.pipeline [--candidates 32] [--latency 0.2] [--concurrency 1 4 16] [--json out.json]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SKILL_POOL = [
+    "Python", "PyTorch", "TensorFlow", "Pandas", "NumPy", "scikit-learn", "NLP", "LLMs", "LangChain",
+    "Docker", "Kubernetes", "AWS", "SQL", "Git", "FastAPI", "Hugging Face", "Computer Vision", "RAG",
+]
+
+
+_SEEN_PREFIXES: set[str] = set()
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic LLM stand-in: canned JSON per system prompt after `latency` seconds.
+    Decisions are derived from a hash of the prompt, so a pool of synthetic CVs
+    exercises every route (pass/fail, interview, phone screen, rejection).
+    Like the provider's prompt cache, a repeated (system, first human message) prefix
+    is reported as `cache_read` input tokens.
+    """
+
+    latency: float = 0.2
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _respond(self, messages) -> AIMessage:
+        from src.agent import prompts
+
+        system = str(messages[0].content)
+        body = "\n".join(str(m.content) for m in messages[1:])
+        seed = _digest(body)
+        skills = [SKILL_POOL[(seed >> i) % len(SKILL_POOL)] for i in range(0, 40, 5)]
+        skills = list(dict.fromkeys(skills))
+        score = float(seed % 101)
+        analysis = {"matched": skills[:3], "missing": ["Kubernetes"], "additional": skills[3:], "score": score}
+        prescreen = {
+            "name": f"Candidate {seed % 10000}", "email": f"candidate{seed % 10000}@example.com",
+            "phone": "+10000000000", "years_of_experience": seed % 8, "skills": skills,
+            "pre_screening_status": "Fail" if seed % 5 == 0 else "Pass",
+        }
+        if system == prompts.jd_profile_system_msg:
+            content = json.dumps({
+                "title": "AI Engineer", "knockout_criteria": ["Bachelor's degree in a related field"],
+                "min_years_experience": 1, "required_skills": ["Python", "PyTorch", "NLP", "LLMs", "Docker"],
+                "nice_to_have_skills": ["Kubernetes", "AWS"],
+            })
+        elif system == prompts.prescreen_system_msg:
+            content = json.dumps(prescreen)
+        elif system == prompts.fused_screening_system_msg:
+            content = json.dumps({**prescreen, "skills_analysis": analysis})
+        elif system == prompts.skills_analysis_system_msg:
+            content = json.dumps({"skills_analysis": analysis})
+        elif system == prompts.batched_rejection_system_msg:
+            content = json.dumps({"reasons": [
+                {"id": applicant["id"], "reason": "The candidate's skills do not yet match the core requirements of this role."}
+                for applicant in json.loads(body)
+            ]})
+        else:
+            content = "The candidate's skills do not yet match the core requirements of this role."
+        tokens_in = sum(len(str(m.content)) for m in messages) // 4
+        tokens_out = len(content) // 4
+        prefix = "\x00".join(str(m.content) for m in messages[:2])
+        cached = len(prefix) // 4 if prefix in _SEEN_PREFIXES else 0
+        _SEEN_PREFIXES.add(prefix)
+        self.prompt_tokens += tokens_in
+        self.cached_tokens += cached
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": tokens_in, "output_tokens": tokens_out, "total_tokens": tokens_in + tokens_out,
+            "input_token_details": {"cache_read": cached},
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+def _pdf_escape(line: str) -> str:
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(text: str, lines_per_page: int = 50) -> bytes:
+    """Minimal text-only PDF (Helvetica, one line per text operator) that pypdf can extract"""
+    lines = [line.replace("\t", "    ") for line in text.splitlines()] or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for page in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"] + [f"({_pdf_escape(line)}) Tj T*" for line in page] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def synthetic_cvs(count: int, workdir: Path) -> list[Path]:
+    """`count` distinct CV PDFs: the example CV with a different name, email, skill mix and project list each"""
+    from src.agent.examples import cv_ai
+
+    paths = []
+    for i in range(count):
+        skills = ", ".join(SKILL_POOL[(i * 7 + k) % len(SKILL_POOL)] for k in range(3 + i % 6))
+        extra = "\n".join(f"- Project {j}: built a {SKILL_POOL[(i + j) % len(SKILL_POOL)]} pipeline" for j in range(i % 4))
+        text = f"Synthetic Candidate {i}\ncandidate{i}@example.com\n{cv_ai}\nTECHNICAL SKILLS\nAlso: {skills}\nPROJECTS\n{extra}\n"
+        path = workdir / f"cv_{i:04d}.pdf"
+        path.write_bytes(make_pdf(text))
+        paths.append(path)
+    return paths
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run, grouped by node name"""
+
+    def __init__(self, node_names: set[str]):
+        self.node_names = node_names
+        self.started: dict[Any, tuple[str, float]] = {}
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, name: Optional[str] = None, **kwargs):
+        # The node's inner runnable reports under the same name; time the outer run only
+        if name in self.node_names and parent_run_id not in self.started:
+            self.started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self.started.pop(run_id, None)
+        if started:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    on_chain_error = on_chain_end
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def bench_extraction(pdfs: list[Path], workers: int) -> dict:
+    from src.agent.extraction import extract_many
+    from src.agent.pdf import extract_pdf_txt
+
+    start = time.perf_counter()
+    for path in pdfs:
+        extract_pdf_txt(path.read_bytes())
+    sequential = time.perf_counter() - start
+
+    result = {"files": len(pdfs), "sequential_s": sequential, "sequential_pdfs_per_s": len(pdfs) / sequential}
+    if workers > 1:
+        start = time.perf_counter()
+        for _ in extract_many([str(p) for p in pdfs], max_workers=workers):
+            pass
+        pooled = time.perf_counter() - start
+        result.update({"workers": workers, "pooled_s": pooled, "pooled_pdfs_per_s": len(pdfs) / pooled})
+    return result
+
+
+def bench_graph(graph, states: list, concurrency: int, use_async: bool) -> tuple[dict, NodeTimer]:
+    """Screen every state once at `concurrency`; returns throughput, decisions and node timings"""
+    timer = NodeTimer(set(graph.nodes) - {"__start__"})
+    config = {"max_concurrency": concurrency, "callbacks": [timer]}
+    tracemalloc.start()
+    start = time.perf_counter()
+    if use_async:
+        results = asyncio.run(graph.abatch(states, config, return_exceptions=True))
+    else:
+        results = graph.batch(states, config, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    decisions: dict[str, int] = defaultdict(int)
+    for result in results:
+        decisions["error" if isinstance(result, BaseException) else result["final_decision"]] += 1
+    return {
+        "concurrency": concurrency,
+        "candidates": len(states),
+        "elapsed_s": elapsed,
+        "candidates_per_s": len(states) / elapsed,
+        "traced_peak_mb": peak / 2**20,
+        "decisions": dict(decisions),
+    }, timer
+
+
+def _git_commit() -> Optional[str]:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the screening pipeline offline with a fake LLM.")
+    parser.add_argument("--candidates", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--mode", choices=["staged", "fused"], default="staged")
+    parser.add_argument("--extract-workers", type=int, default=4)
+    parser.add_argument("--use-async", action="store_true", help="Drive the graph with abatch")
+    parser.add_argument("--json", help="Write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Cold, isolated caches: must be set before the agent modules read them
+        os.environ["LLM_CACHE_PATH"] = ""
+        os.environ["CV_TEXT_CACHE_PATH"] = str(Path(workdir) / "cv_text.sqlite")
+        os.environ["JD_PROFILE_CACHE_PATH"] = str(Path(workdir) / "jd_profiles.sqlite")
+        # Default routing policy and no leftovers from real runs in .cache/
+        os.environ["ROUTING_POLICY_PATH"] = str(Path(workdir) / "policies.sqlite")
+        os.environ["RESULTS_DB_PATH"] = str(Path(workdir) / "results.sqlite")
+        os.environ["NEAR_DUPLICATE_INDEX_PATH"] = str(Path(workdir) / "near_duplicates.sqlite")
+        sys.path.insert(0, str(ROOT))
+
+        from src.agent import nodes
+        from src.agent.batch import initial_state
+        from src.agent.examples import jd_ai
+        from src.agent.graph import build_graph
+        from src.agent.jd import compile_jd
+        from src.agent.pdf import register_cv
+
+        llm = FakeChatModel(latency=args.latency)
+        nodes.set_llm(llm)
+        pdfs = synthetic_cvs(args.candidates, Path(workdir))
+
+        extraction = bench_extraction(pdfs, args.extract_workers)
+        print(f"extraction: {extraction['sequential_pdfs_per_s']:.1f} PDFs/s sequential"
+              + (f", {extraction['pooled_pdfs_per_s']:.1f} PDFs/s with {args.extract_workers} workers"
+                 if "pooled_s" in extraction else ""))
+
+        graph = build_graph(args.mode)
+        jd_id = compile_jd(jd_ai, llm)["jd_hash"]
+        states = [initial_state(jd_id, register_cv(path)) for path in pdfs]
+
+        throughput = []
+        node_latency: dict[str, list[float]] = defaultdict(list)
+        for concurrency in args.concurrency:
+            calls_before, prompt_before, cached_before = llm.calls, llm.prompt_tokens, llm.cached_tokens
+            run, timer = bench_graph(graph, states, concurrency, args.use_async)
+            run["llm_calls"] = llm.calls - calls_before
+            prompt_tokens = llm.prompt_tokens - prompt_before
+            run["cached_token_ratio"] = (llm.cached_tokens - cached_before) / prompt_tokens if prompt_tokens else 0.0
+            throughput.append(run)
+            for node, samples in timer.durations.items():
+                node_latency[node].extend(samples)
+            print(f"concurrency {concurrency:>3}: {run['candidates_per_s']:.2f} candidates/s "
+                  f"({run['elapsed_s']:.2f} s, {run['llm_calls']} LLM calls, {run['cached_token_ratio']:.0%} prompt tokens cached, "
+                  f"peak {run['traced_peak_mb']:.1f} MB)")
+
+        nodes_summary = {node: _summary(samples) for node, samples in sorted(node_latency.items())}
+        for node, summary in nodes_summary.items():
+            print(f"    {node:<22} p50 {summary['p50_ms']:8.1f} ms  p95 {summary['p95_ms']:8.1f} ms  ({summary['count']} runs)")
+
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "extraction": extraction,
+        "throughput": throughput,
+        "node_latency": nodes_summary,
+        "max_rss_mb": _max_rss_mb(),
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+if __name__ == "__main__":
+    sys.exit(main())
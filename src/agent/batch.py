@@ -0,0 +1,520 @@
+"""
+Bulk screening: run one job description against many CV PDFs through the graph.
+
+Usage:
+    python -m src.agent.batch --jd jd.txt --out results.jsonl cvs/ more_cvs.zip extra.pdf
+    python -m src.agent.batch --jd jd.txt --out results.jsonl --resume cvs/   # after a crash or outage
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from src.agent.dedup import NearDuplicateIndex
+from src.agent.extraction import extract_many
+from src.agent.graph import build_graph, graph
+from src.agent.jd import compile_jd, acompile_jd, get_jd_profile
+from src.agent import dedup, metrics, nodes
+from src.agent.pdf import get_cv_text, register_cv
+from src.agent.ranking import shortlist
+from src.agent.ratelimit import BATCH, priority
+from src.agent.rejections import agenerate_rejection_reasons, generate_rejection_reasons
+from src.agent.results import ResultStore, ScreeningResult
+from src.agent.state import SharedState, SkillAnalysis
+
+
+ProgressCallback = Callable[[int, int, ScreeningResult], None]
+
+
+def initial_state(jd_id: str, cv_hash: str) -> SharedState:
+    """
+    Build the empty state the graph starts from for one candidate.
+    The JD is referenced by its registered id (see src/agent/jd.py), not copied into every state.
+    """
+    state = SharedState(
+        name="",
+        email="",
+        phone="",
+        years_of_experience=0,
+        skills=[],
+        pre_screening_status="Fail",
+        skills_analysis={
+            "matched": [],
+            "missing": [],
+            "additional": [],
+            "score": 0.0
+        },
+        final_decision="Rejected",
+        rejection_reason="",
+        knockout_reason="",
+        jd_id=jd_id,
+        cv_hash=cv_hash
+    )
+    return state
+
+
+def collect_pdfs(sources: Iterable[str], workdir: str) -> list[Path]:
+    """
+    Expand directories, ZIP archives and single files into a sorted list of PDF paths.
+    ZIP archives are extracted into `workdir`, which must outlive the batch run.
+    """
+    pdfs: list[Path] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            pdfs.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() == ".pdf"))
+        elif path.suffix.lower() == ".zip":
+            target = Path(workdir) / path.stem
+            with zipfile.ZipFile(path) as archive:
+                members = [m for m in archive.namelist() if m.lower().endswith(".pdf")]
+                archive.extractall(target, members=members)
+            pdfs.extend(sorted(target / m for m in members))
+        elif path.suffix.lower() == ".pdf":
+            pdfs.append(path)
+        else:
+            raise ValueError(f"Unsupported CV source: {source}")
+    return pdfs
+
+
+def to_record(pdf_path: Path, result: Any, jd_id: str, status: str = "ok") -> ScreeningResult:
+    """Turn a graph result (or the exception it raised) into one result record"""
+    if isinstance(result, BaseException):
+        return ScreeningResult.from_error(str(pdf_path), result, jd_id)
+    return ScreeningResult.from_state(str(pdf_path), result, jd_id, status)
+
+
+def thread_id(jd_id: str, cv_hash: str) -> str:
+    """Checkpoint thread of one candidate/JD pair"""
+    return f"{jd_id}:{cv_hash}"
+
+
+@contextmanager
+def checkpointed_graph(checkpoint_db: Optional[str], rejections: Optional[str] = None):
+    """
+    The module graph, or one compiled with a SQLite checkpointer at `checkpoint_db`
+    and/or the given rejection mode (see `build_graph`).
+    """
+    if not checkpoint_db:
+        yield graph if rejections is None else build_graph(rejections=rejections)
+        return
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    Path(checkpoint_db).parent.mkdir(parents=True, exist_ok=True)
+    with SqliteSaver.from_conn_string(checkpoint_db) as saver:
+        yield build_graph(checkpointer=saver, rejections=rejections)
+
+
+@asynccontextmanager
+async def acheckpointed_graph(checkpoint_db: Optional[str], rejections: Optional[str] = None):
+    """Async counterpart of `checkpointed_graph` (the async graph needs an async saver)"""
+    if not checkpoint_db:
+        yield graph if rejections is None else build_graph(rejections=rejections)
+        return
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    Path(checkpoint_db).parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(checkpoint_db) as saver:
+        yield build_graph(checkpointer=saver, rejections=rejections)
+
+
+def register_stream(pdf_paths: list[Path], extract_workers: Optional[int] = None) -> Iterator[tuple[int, Any]]:
+    """
+    Register every PDF, yielding (position, CV hash) as each one is parsed; files that cannot
+    be parsed yield their exception instead.
+    With `extract_workers` the parsing runs in a process pool and results arrive in
+    completion order (see src/agent/extraction.py).
+    """
+    if extract_workers is None:
+        for idx, path in enumerate(pdf_paths):
+            try:
+                yield idx, register_cv(path)
+            except Exception as e:
+                yield idx, e
+        return
+
+    positions: dict[str, list[int]] = {}
+    for idx, path in enumerate(pdf_paths):
+        positions.setdefault(str(path), []).append(idx)
+    for extraction in extract_many(positions, max_workers=extract_workers):
+        outcome = Exception(extraction["error"]) if extraction["error"] else extraction["cv_hash"]
+        for idx in positions[extraction["source"]]:
+            yield idx, outcome
+
+
+class _BatchRun:
+    """Bookkeeping shared by the sync and async batch drivers"""
+
+    def __init__(self, jd_text: str, jd_id: str, pdf_paths: list[Path], on_progress: Optional[ProgressCallback]):
+        self.pdf_paths = pdf_paths
+        self.on_progress = on_progress
+        self.records: list[Optional[ScreeningResult]] = [None] * len(pdf_paths)
+        self.done = 0
+        self.rank_scores: dict[int, float] = {}
+        self.thread_ids: dict[int, str] = {}
+        self.first: dict[str, int] = {}
+        self.duplicates: dict[int, list[int]] = {}
+        self.cv_hashes: dict[int, str] = {}
+        self.duplicate_of: dict[int, tuple[str, float]] = {}
+        self.seen_in: dict[int, list[str]] = {}
+        self.jd_text = jd_text
+        self.jd_id = jd_id
+
+    def registered(self, registrations: Iterable[tuple[int, Any]]) -> Iterator[tuple[int, str]]:
+        """Record registration failures and pass the remaining candidates on"""
+        for idx, cv_hash in registrations:
+            if isinstance(cv_hash, Exception):
+                self.finish(idx, cv_hash)
+            else:
+                self.cv_hashes[idx] = cv_hash
+                yield idx, cv_hash
+
+    def shortlist(self, candidates: list[tuple[int, str]], top_k: Optional[int],
+                  min_rank_score: Optional[float]) -> list[tuple[int, str]]:
+        """
+        BM25-rank the candidates against the JD (see src/agent/ranking.py).
+        Only the top-K / above-cutoff candidates are returned; the rest get a "deferred" record.
+        """
+        cv_hashes = dict(candidates)
+        docs = {str(idx): get_cv_text(cv_hash) for idx, cv_hash in candidates}
+        keep, deferred = shortlist(docs, self.jd_text, get_jd_profile(self.jd_id), top_k, min_rank_score)
+        self.rank_scores = {int(doc_id): score for doc_id, score in keep + deferred}
+        for doc_id, _ in deferred:
+            idx = int(doc_id)
+            self.finish(idx, {"cv_hash": cv_hashes[idx]}, status="deferred")
+        return [(int(doc_id), cv_hashes[int(doc_id)]) for doc_id, _ in keep]
+
+    def _share(self, first: int, idx: int) -> None:
+        """`idx` gets the result of `first`, now or when `first` finishes"""
+        if self.records[first] is not None:
+            self.finish(idx, self.records[first])
+        else:
+            self.duplicates.setdefault(first, []).append(idx)
+
+    def admit(self, idx: int, cv_hash: str, index: Optional[NearDuplicateIndex],
+              store: Optional[ResultStore]) -> bool:
+        """
+        Decide whether a registered candidate needs a graph run. The same CV twice shares one
+        run (it must not run concurrently on one checkpoint thread). With `index`, a
+        near-duplicate (see src/agent/dedup.py) of a CV earlier in the batch reuses that CV's
+        result, one already screened for this requisition reuses the stored result, and CVs
+        with results in other requisitions are flagged in `seen_in`.
+        """
+        if cv_hash in self.first:
+            self._share(self.first[cv_hash], idx)
+            return False
+        if index is not None:
+            matches = index.query(cv_hash)
+            if store is not None:
+                seen = store.requisitions([cv_hash, *(other for other, _ in matches)]) - {self.jd_id}
+                if seen:
+                    self.seen_in[idx] = sorted(seen)
+            in_batch = next(((other, score) for other, score in matches if other in self.first), None)
+            if in_batch is not None:
+                self.duplicate_of[idx] = (in_batch[0], round(in_batch[1], 4))
+                self._share(self.first[in_batch[0]], idx)
+                return False
+            stored = next(
+                ((other, score, record) for other, score in matches
+                 if store is not None and (record := store.get(self.jd_id, other)) and record.get("status") == "ok"),
+                None,
+            )
+            if stored is not None:
+                other, score, record = stored
+                self.duplicate_of[idx] = (other, round(score, 4))
+                self.finish(idx, record)
+                return False
+        self.first[cv_hash] = idx
+        return True
+
+    def config(self, idx: int, cv_hash: str, checkpointed: bool) -> dict:
+        """Run config; checkpointed runs get a thread id per candidate/JD pair"""
+        if not checkpointed:
+            return {}
+        thread = self.thread_ids[idx] = thread_id(self.jd_id, cv_hash)
+        return {"configurable": {"thread_id": thread}}
+
+    def plan(self, idx: int, cv_hash: str, snapshot: Any) -> tuple[bool, Any]:
+        """
+        What to run for a candidate given its checkpoint snapshot (None = no resume), as
+        (run?, graph input): completed threads are reported from the checkpoint, failed
+        threads restart at the failing node (input None), everything else starts from a fresh state.
+        """
+        if snapshot is not None and snapshot.values and not snapshot.next:
+            self.finish(idx, snapshot.values, from_checkpoint=True)
+            return False, None
+        if snapshot is not None and snapshot.next:
+            return True, None
+        return True, initial_state(self.jd_id, cv_hash)
+
+    def pending_rejections(self) -> dict[str, SkillAnalysis]:
+        """Skills analyses of rejected candidates still waiting for a reason, keyed by record index"""
+        return {
+            str(idx): record.skills_analysis
+            for idx, record in enumerate(self.records)
+            if record.status == "ok" and record.final_decision == "Rejected" and not record.rejection_reason
+        }
+
+    def set_rejection_reasons(self, reasons: dict[str, str]) -> None:
+        for idx, reason in reasons.items():
+            self.records[int(idx)].rejection_reason = reason
+
+    def finish(self, idx: int, result: Any, status: str = "ok", from_checkpoint: bool = False) -> None:
+        if isinstance(result, ScreeningResult):
+            # Shared with an earlier candidate: same outcome, this candidate's file
+            record = ScreeningResult(**{**result.to_dict(), "file": str(self.pdf_paths[idx])})
+        else:
+            record = to_record(self.pdf_paths[idx], result, self.jd_id, status)
+        if idx in self.rank_scores:
+            record.rank_score = round(self.rank_scores[idx], 4)
+        record.thread_id = self.thread_ids.get(idx)
+        if from_checkpoint:
+            record.from_checkpoint = True
+        if idx in self.duplicate_of:
+            record.cv_hash = self.cv_hashes[idx]
+            record.duplicate_of, record.similarity = self.duplicate_of[idx]
+        record.seen_in = self.seen_in.get(idx)
+        self.records[idx] = record
+        self.done += 1
+        if self.on_progress:
+            self.on_progress(self.done, len(self.pdf_paths), record)
+        for duplicate in self.duplicates.pop(idx, []):
+            self.finish(duplicate, record)
+
+
+def _candidates(run: _BatchRun, extract_workers: Optional[int], top_k: Optional[int], min_rank_score: Optional[float],
+                index: Optional[NearDuplicateIndex], store: Optional[ResultStore]) -> Iterator[tuple[int, str]]:
+    """
+    Candidates that need a graph run, as soon as their PDF is parsed. Shortlisting ranks
+    the whole batch, so with `top_k` / `min_rank_score` nothing is yielded before every PDF is parsed.
+    """
+    candidates: Iterable[tuple[int, str]] = run.registered(register_stream(run.pdf_paths, extract_workers))
+    if top_k is not None or min_rank_score is not None:
+        candidates = run.shortlist(list(candidates), top_k, min_rank_score)
+    for idx, cv_hash in candidates:
+        if run.admit(idx, cv_hash, index, store):
+            yield idx, cv_hash
+
+
+def screen_batch(
+    jd_text: str,
+    pdf_paths: list[Path],
+    max_concurrency: int = 8,
+    on_progress: Optional[ProgressCallback] = None,
+    extract_workers: Optional[int] = None,
+    top_k: Optional[int] = None,
+    min_rank_score: Optional[float] = None,
+    checkpoint_db: Optional[str] = None,
+    resume: bool = False,
+    batch_rejections: bool = True,
+    result_store: Optional[ResultStore] = None,
+    near_duplicate_index: Optional[NearDuplicateIndex] = None,
+) -> list[ScreeningResult]:
+    """
+    Screen every PDF against `jd_text` with at most `max_concurrency` graph runs in flight.
+    Each candidate starts as soon as its PDF is parsed, so screening overlaps extraction.
+    A failing candidate produces an error record instead of aborting the batch.
+    Records are returned in the order of `pdf_paths`.
+    The JD is registered and compiled into a requirements profile once; every candidate's
+    state references it by id.
+    With `top_k` / `min_rank_score` only the best BM25-ranked candidates reach the graph.
+    With `checkpoint_db` every candidate runs on its own checkpointed thread; `resume` then
+    skips completed threads and restarts failed ones at the node that failed.
+    With `batch_rejections` the graph does not write rejection reasons one by one: they are
+    generated afterwards, many per LLM call (see src/agent/rejections.py).
+    With `near_duplicate_index` near-duplicate CVs reuse the result of their first occurrence
+    or, with `result_store`, a stored result of this requisition; records are written to
+    `result_store` at the end.
+    """
+    if resume and not checkpoint_db:
+        raise ValueError("resume requires a checkpoint_db")
+    # Background work: interactive (Streamlit) LLM calls in the same process go first
+    with priority(BATCH):
+        run = _BatchRun(jd_text, compile_jd(jd_text, nodes.get_llm())["jd_hash"], pdf_paths, on_progress)
+        candidates = _candidates(run, extract_workers, top_k, min_rank_score, near_duplicate_index, result_store)
+        with checkpointed_graph(checkpoint_db, "deferred" if batch_rejections else None) as screening_graph, \
+                ContextThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            running: dict[Future, int] = {}
+
+            def collect(futures) -> None:
+                for future in futures:
+                    idx = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = e
+                    run.finish(idx, result)
+
+            for idx, cv_hash in candidates:
+                config = run.config(idx, cv_hash, checkpoint_db is not None)
+                start, graph_input = run.plan(idx, cv_hash, screening_graph.get_state(config) if resume else None)
+                if not start:
+                    continue
+                # At most `max_concurrency` runs: parsing further PDFs waits for a free slot
+                while len(running) >= max_concurrency:
+                    collect(wait(running, return_when=FIRST_COMPLETED).done)
+                running[pool.submit(screening_graph.invoke, graph_input, config)] = idx
+            while running:
+                collect(wait(running, return_when=FIRST_COMPLETED).done)
+        if batch_rejections:
+            run.set_rejection_reasons(generate_rejection_reasons(run.pending_rejections(), nodes.get_llm()))
+    if result_store is not None:
+        result_store.put_many(run.records)
+    return run.records
+
+
+async def _athreaded(iterator: Iterator) -> AsyncIterator:
+    """Drive a blocking iterator from a worker thread"""
+    done = object()
+    while (item := await asyncio.to_thread(next, iterator, done)) is not done:
+        yield item
+
+
+async def ascreen_batch(
+    jd_text: str,
+    pdf_paths: list[Path],
+    max_concurrency: int = 8,
+    on_progress: Optional[ProgressCallback] = None,
+    extract_workers: Optional[int] = None,
+    top_k: Optional[int] = None,
+    min_rank_score: Optional[float] = None,
+    checkpoint_db: Optional[str] = None,
+    resume: bool = False,
+    batch_rejections: bool = True,
+    result_store: Optional[ResultStore] = None,
+    near_duplicate_index: Optional[NearDuplicateIndex] = None,
+) -> list[ScreeningResult]:
+    """Async counterpart of `screen_batch`: graph runs are tasks, PDF parsing stays in worker threads"""
+    if resume and not checkpoint_db:
+        raise ValueError("resume requires a checkpoint_db")
+    with priority(BATCH):
+        run = _BatchRun(jd_text, (await acompile_jd(jd_text, nodes.get_llm()))["jd_hash"], pdf_paths, on_progress)
+        candidates = _candidates(run, extract_workers, top_k, min_rank_score, near_duplicate_index, result_store)
+        async with acheckpointed_graph(checkpoint_db, "deferred" if batch_rejections else None) as screening_graph:
+            running: dict[asyncio.Task, int] = {}
+
+            def collect(tasks) -> None:
+                for task in tasks:
+                    idx = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = e
+                    run.finish(idx, result)
+
+            async for idx, cv_hash in _athreaded(candidates):
+                config = run.config(idx, cv_hash, checkpoint_db is not None)
+                start, graph_input = run.plan(idx, cv_hash, await screening_graph.aget_state(config) if resume else None)
+                if not start:
+                    continue
+                while len(running) >= max_concurrency:
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                running[asyncio.create_task(screening_graph.ainvoke(graph_input, config))] = idx
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+        if batch_rejections:
+            run.set_rejection_reasons(await agenerate_rejection_reasons(run.pending_rejections(), nodes.get_llm()))
+    if result_store is not None:
+        await asyncio.to_thread(result_store.put_many, run.records)
+    return run.records
+
+
+def write_results(records: list[ScreeningResult], out_path: str) -> None:
+    """Write one JSON line per candidate"""
+    with open(out_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+
+
+def print_progress(done: int, total: int, record: ScreeningResult) -> None:
+    if record.status == "error":
+        outcome = f"error ({record.error})"
+    else:
+        outcome = record.final_decision or record.status
+    print(f"[{done}/{total}] {record.file}: {outcome}", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Screen many CV PDFs against one job description.")
+    parser.add_argument("sources", nargs="+", help="PDF files, directories of PDFs or ZIP archives")
+    parser.add_argument("--jd", required=True, help="Path to a text file with the job description")
+    parser.add_argument("--out", default="results.jsonl", help="Output JSONL file (one record per candidate)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of concurrent graph runs")
+    parser.add_argument("--use-async", action="store_true", help="Run graph runs as asyncio tasks instead of threads")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="Only screen the K best candidates by BM25 rank against the JD; defer the rest")
+    parser.add_argument("--min-rank-score", type=float, default=None,
+                        help="Only screen candidates whose BM25 rank score is at least this value")
+    parser.add_argument("--checkpoint-db", default=".cache/checkpoints.sqlite",
+                        help="SQLite checkpoint database (one thread per candidate/JD pair)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Run without checkpointing")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip candidates already completed in the checkpoint database and resume failed ones")
+    parser.add_argument("--inline-rejections", action="store_true",
+                        help="Write each rejection reason inside the graph instead of batching them after the run")
+    parser.add_argument("--results-db", default=os.getenv("RESULTS_DB_PATH", ".cache/results.sqlite"),
+                        help="SQLite result store indexed by requisition, decision and score ('' to disable)")
+    parser.add_argument("--near-duplicate-threshold", type=float, default=None,
+                        help=f"MinHash similarity above which CVs reuse an earlier result (default: NEAR_DUPLICATE_THRESHOLD or {dedup.DEFAULT_THRESHOLD:g})")
+    parser.add_argument("--no-dedupe", action="store_true", help="Screen near-duplicate CVs independently")
+    parser.add_argument("--extract-workers", type=int, default=None,
+                        help="Parse PDFs in a pool of this many processes (default: in-process)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this port (/metrics, /metrics.json) while the batch runs")
+    parser.add_argument("--metrics-json", default=None, help="Write the per-node metrics summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    jd_text = Path(args.jd).read_text(encoding="utf-8")
+    checkpoint_db = None if args.no_checkpoint else args.checkpoint_db
+    result_store = ResultStore(args.results_db) if args.results_db else None
+    near_duplicate_index = None if args.no_dedupe else NearDuplicateIndex.from_env(args.near_duplicate_threshold)
+    if args.metrics_port is not None:
+        metrics.serve_metrics(args.metrics_port)
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        pdfs = collect_pdfs(args.sources, workdir)
+        if not pdfs:
+            print("No PDF files found.", file=sys.stderr)
+            return 1
+        if args.use_async:
+            records = asyncio.run(
+                ascreen_batch(
+                    jd_text, pdfs, args.concurrency, print_progress, args.extract_workers,
+                    args.top_k, args.min_rank_score, checkpoint_db, args.resume,
+                    not args.inline_rejections, result_store, near_duplicate_index,
+                )
+            )
+        else:
+            records = screen_batch(
+                jd_text, pdfs, args.concurrency, print_progress, args.extract_workers,
+                args.top_k, args.min_rank_score, checkpoint_db, args.resume,
+                not args.inline_rejections, result_store, near_duplicate_index,
+            )
+
+    write_results(records, args.out)
+    if args.metrics_json:
+        Path(args.metrics_json).write_text(json.dumps(metrics.REGISTRY.summary(), indent=2))
+    failed = sum(1 for r in records if r.status == "error")
+    deferred = sum(1 for r in records if r.status == "deferred")
+    duplicates = sum(1 for r in records if r.duplicate_of)
+    print(f"Screened {len(records)} CVs ({failed} failed, {deferred} deferred, {duplicates} near-duplicates reused) -> {args.out}",
+          file=sys.stderr)
+    total = metrics.REGISTRY.summary()["total"]
+    if total["prompt_tokens"]:
+        print(f"{total['prompt_tokens']} prompt tokens, {total['cached_token_ratio']:.0%} served from the provider prompt cache",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
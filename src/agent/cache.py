@@ -0,0 +1,272 @@
+"""
+Persistent, content-addressed caches.
+
+`LLMCache` stores LLM responses keyed on the SHA-256 of the model parameters
+(`llm_string`, which carries the model name and temperature) and the exact
+serialized message list, so re-screening the same CV against the same JD never
+pays for a second call. `TextCache` is a plain hash -> text store used for
+extracted CV text.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+DEFAULT_CACHE_PATH = ".cache/llm_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Expired entries are swept once per this many writes
+TTL_SWEEP_EVERY = 256
+# A full cache is trimmed to this share of `max_entries`, so LRU eviction runs in batches
+EVICT_TO_RATIO = 0.9
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a SQLite database shared between threads, creating its directory if needed"""
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class LLMCache(BaseCache):
+    """
+    SQLite-backed LangChain cache with size (LRU) and TTL eviction and hit/miss counters.
+    Eviction stays off the per-response path: the entry count is tracked in memory, LRU
+    eviction only runs once it passes `max_entries`, and expired entries (also dropped when
+    looked up) are swept every `TTL_SWEEP_EVERY` writes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created_at)")
+        self._conn.commit()
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMCache"]:
+        """
+        Build the cache from `LLM_CACHE_PATH`, `LLM_CACHE_MAX_ENTRIES` and `LLM_CACHE_TTL_SECONDS`.
+        Returns None when `LLM_CACHE_PATH` is set to an empty string.
+        """
+        path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if not path:
+            return None
+        ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        return cls(
+            path=path,
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=ttl if ttl > 0 else None,
+        )
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Content address of one call: model parameters plus the exact message list"""
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                self._entries -= 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        generations = _loads(row[0])
+        # Lets callbacks (src/agent/metrics.py) tell cached answers from API calls
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), "cache_hit": True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, _dumps(return_val), now, now),
+            )
+            # Writes follow misses, so a replaced key is rare: counting every write is close enough
+            self._entries += 1
+            self._writes += 1
+            if self._entries > self.max_entries or self._writes % TTL_SWEEP_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._entries = 0
+
+    def _evict(self, now: float) -> None:
+        """
+        Drop expired entries, then, above `max_entries`, the least recently used ones down to
+        `EVICT_TO_RATIO` of it; resyncs the entry count
+        """
+        if self.ttl_seconds is not None:
+            cur = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.evictions += cur.rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        self._entries = count
+        overflow = count - int(self.max_entries * EVICT_TO_RATIO) if count > self.max_entries else 0
+        if overflow > 0:
+            cur = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += cur.rowcount
+            self._entries -= cur.rowcount
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus the current number of stored entries"""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+        }
+
+
+class TextCache:
+    """
+    Hash-keyed text store: a small in-memory LRU in front of a SQLite table.
+    """
+
+    def __init__(self, path: str, table: str, max_entries: int = DEFAULT_MAX_ENTRIES, memory_entries: int = 256):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Open the database on first use so module-level caches cost nothing at import"""
+        if self._db is None:
+            conn = connect(self.path)
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.commit()
+            self._db = conn
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.pop(key, None)
+            if value is None:
+                row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value = row[0]
+                self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            self._remember(key, value)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+            self._remember(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+            return self._conn.execute(f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)).fetchone() is not None
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory.pop(key, None)
+        self._memory[key] = value
+        while len(self._memory) > self.memory_entries:
+            self._memory.pop(next(iter(self._memory)))
+
+
+def _dumps(generations: RETURN_VAL_TYPE) -> str:
+    payload = []
+    for gen in generations:
+        item: dict = {"text": gen.text, "generation_info": gen.generation_info}
+        if isinstance(gen, ChatGeneration):
+            item["message"] = message_to_dict(gen.message)
+        payload.append(item)
+    return json.dumps(payload)
+
+
+def _loads(value: str) -> RETURN_VAL_TYPE:
+    generations: list[Generation] = []
+    for item in json.loads(value):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
@@ -0,0 +1,103 @@
+"""
+Tiered models for screening (MODEL_CASCADE=1).
+
+Prescreening, skills scoring and fused screening ask a small model
+(`GROQ_SMALL_MODEL`, default openai/gpt-oss-20b) first. Its answer is kept when
+it is clear-cut, and the same prompt is sent to the large model when:
+- the small model fails, or its answer does not parse or misses required fields
+  (a fused answer always needs a well-formed `skills_analysis`, even on Fail)
+- a skills score lands within `CASCADE_MARGIN` points of the requisition's
+  routing thresholds (50/80 by default, see src/agent/policy.py), where a few
+  points decide between two outcomes
+
+Rejection reasons and JD compilation keep using the large model.
+"""
+import json
+import os
+from typing import Any, Callable, Optional
+
+from src.agent import metrics
+from src.agent.state import RoutingPolicy
+
+
+CASCADE_ENABLED = os.getenv("MODEL_CASCADE", "0") == "1"
+CASCADE_MARGIN = float(os.getenv("CASCADE_MARGIN", "5"))
+
+PRESCREENING_FIELDS = ("name", "email", "phone", "years_of_experience", "skills", "pre_screening_status")
+
+Accept = Callable[[Any], bool]
+
+
+def parse(response) -> Optional[dict]:
+    """The JSON object of a response, None if it is not one"""
+    try:
+        data = json.loads(str(response.content))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def valid_prescreening(data: dict) -> bool:
+    return all(field in data for field in PRESCREENING_FIELDS) and data["pre_screening_status"] in ("Pass", "Fail")
+
+
+def valid_skills_analysis(analysis: Any) -> bool:
+    if not isinstance(analysis, dict):
+        return False
+    lists_ok = all(isinstance(analysis.get(field), list) for field in ("matched", "missing", "additional"))
+    score = analysis.get("score")
+    return lists_ok and isinstance(score, (int, float)) and 0 <= score <= 100
+
+
+def borderline(score: float, policy: RoutingPolicy, margin: float = CASCADE_MARGIN) -> bool:
+    """True when `score` is within `margin` points of a routing threshold"""
+    return any(abs(score - threshold) <= margin for threshold in (policy["phone_screen_min"], policy["interview_above"]))
+
+
+def accept_prescreening(response) -> bool:
+    data = parse(response)
+    return data is not None and valid_prescreening(data)
+
+
+def accept_skills_analysis(policy: RoutingPolicy) -> Accept:
+    def accept(response) -> bool:
+        analysis = (parse(response) or {}).get("skills_analysis")
+        return valid_skills_analysis(analysis) and not borderline(analysis["score"], policy)
+    return accept
+
+
+def accept_fused_screening(policy: RoutingPolicy) -> Accept:
+    def accept(response) -> bool:
+        data = parse(response)
+        if data is None or not valid_prescreening(data):
+            return False
+        analysis = data.get("skills_analysis")
+        if not valid_skills_analysis(analysis):
+            return False
+        # A failed candidate is rejected whatever the score, so only a pass can be borderline
+        return data["pre_screening_status"] == "Fail" or not borderline(analysis["score"], policy)
+    return accept
+
+
+def invoke(small, large, messages: list, accept: Accept):
+    """Answer from `small` when `accept` keeps it, else from `large`"""
+    try:
+        response = small.invoke(messages)
+    except Exception:
+        response = None
+    if response is not None and accept(response):
+        return response
+    metrics.record(llm_escalations=1)
+    return large.invoke(messages)
+
+
+async def ainvoke(small, large, messages: list, accept: Accept):
+    """Async variant of `invoke`"""
+    try:
+        response = await small.ainvoke(messages)
+    except Exception:
+        response = None
+    if response is not None and accept(response):
+        return response
+    metrics.record(llm_escalations=1)
+    return await large.ainvoke(messages)
@@ -0,0 +1,195 @@
+"""
+Section-aware CV compaction.
+
+`segment_cv` splits extracted CV text into contact, experience, education,
+skills, projects and other sections by recognizing headings, and normalizes
+whitespace and bullets while dropping page headers and footers (lines repeated
+at page boundaries). Only clear headings switch sections: a known heading on its
+own line, or an all-caps or colon-terminated line naming a section keyword, so
+job titles such as "Project Manager" stay where they are. `compact_cv` then
+assembles a token-budgeted representation: experience and education are always
+kept whole, the other sections fill the rest of the budget, `other`
+(extracurriculars, hobbies, references...) last.
+"""
+import os
+import re
+
+from src.agent.state import CompactionStats
+
+
+# Section -> heading keywords. Certifications count as skills: knockouts often depend on them.
+SECTION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "experience": ("experience", "employment", "work history", "professional background", "internship", "career",
+                   "summary", "objective", "profile", "about"),
+    "education": ("education", "academic", "coursework", "qualification", "degree"),
+    "skills": ("skill", "technologies", "technical", "tools", "certificat", "certification", "course", "languages", "competenc"),
+    "projects": ("project", "portfolio", "publication", "research"),
+    "other": ("extracurricular", "activities", "volunteer", "interest", "hobbies", "reference", "award", "honor", "leadership"),
+}
+# Section -> headings recognized on their own in any case ("&" reads as "and")
+SECTION_HEADINGS: dict[str, tuple[str, ...]] = {
+    "experience": ("experience", "work experience", "professional experience", "relevant experience", "employment",
+                   "employment history", "work history", "professional background", "career history", "internships",
+                   "internship experience", "summary", "professional summary", "objective", "career objective",
+                   "profile", "professional profile", "about me"),
+    "education": ("education", "education and training", "academic background", "academic qualifications",
+                  "qualifications", "coursework", "relevant coursework"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies", "tools", "certifications",
+               "certificates", "licenses and certifications", "skills and certifications", "courses", "languages",
+               "competencies", "core competencies"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects", "portfolio", "publications",
+                 "research"),
+    "other": ("extracurricular activities", "activities", "volunteering", "volunteer experience", "interests",
+              "hobbies", "hobbies and interests", "references", "awards", "honors", "honors and awards",
+              "awards and honors", "achievements", "leadership"),
+}
+# Assembly priority when the budget is tight
+SECTION_PRIORITY = ("contact", "experience", "education", "skills", "projects", "other")
+# Never cut: knockouts and the LLM read years of experience and degrees from them
+WHOLE_SECTIONS = ("experience", "education")
+TRUNCATED = "[truncated]"
+SECTION_ORDER = ("contact", "experience", "education", "skills", "projects", "other")
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", "1200"))
+# Extracurriculars, hobbies and references come last; set to 0 to leave them out entirely
+KEEP_OTHER = os.getenv("CV_KEEP_OTHER_SECTIONS", "1") == "1"
+BULLET_RE = re.compile(r"^[\s•●▪◦·\-\*–]+")
+# Lines this close to a page boundary may be running headers or footers
+PAGE_EDGE_LINES = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)"""
+    return (len(text) + 3) // 4
+
+
+def _heading(line: str) -> tuple[str, bool] | None:
+    """
+    (section, known heading?) if `line` is a clear heading: a known heading on its own, or a
+    short all-caps / colon-terminated line naming a section keyword. Title Case alone is not
+    enough: "Senior Research Engineer" is a job title, not a projects heading.
+    """
+    stripped = line.strip()
+    text = stripped.rstrip(":").strip()
+    if not text or len(text) > 40 or BULLET_RE.match(line):
+        return None
+    lowered = re.sub(r"\s*&\s*", " and ", text.lower())
+    for section, headings in SECTION_HEADINGS.items():
+        if lowered in headings:
+            return section, True
+    if not (text.isupper() or stripped.endswith(":")):
+        return None
+    for section, keywords in SECTION_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            return section, False
+    return None
+
+
+def _normalize_line(line: str) -> str:
+    line = re.sub(r"[ \t ]+", " ", line).strip()
+    if BULLET_RE.match(line):
+        line = "- " + BULLET_RE.sub("", line)
+    return line
+
+
+def _page_edges(lines: list[str]) -> set[int]:
+    """
+    Indexes of the lines within PAGE_EDGE_LINES of a page boundary. The extractors join
+    pages with a blank line, so every run of non-blank lines is treated as a page.
+    """
+    edges: set[int] = set()
+    start = None
+    for i, line in enumerate([*lines, ""]):
+        if line and start is None:
+            start = i
+        elif not line and start is not None:
+            edges.update(range(start, min(start + PAGE_EDGE_LINES, i)))
+            edges.update(range(max(i - PAGE_EDGE_LINES, start), i))
+            start = None
+    return edges
+
+
+def segment_blocks(cv_text: str) -> list[tuple[str, bool, list[str]]]:
+    """
+    CV text as consecutive (section, known heading?, normalized lines) blocks, each starting
+    with its heading line. Text before the first heading is a "contact" block without one.
+    A block whose heading only contains a section keyword ("ACADEMIC TUTOR") is a guess.
+    """
+    blocks: list[tuple[str, bool, list[str]]] = [("contact", False, [])]
+    lines = [_normalize_line(raw) for raw in cv_text.splitlines()]
+    edges = _page_edges(lines)
+    seen_at_edges: set[str] = set()
+    for i, line in enumerate(lines):
+        if not line or line == "-":
+            continue
+        heading = _heading(line)
+        if heading:
+            blocks.append((*heading, [line.rstrip(":").upper()]))
+            continue
+        if i in edges and len(line) > 3:
+            # A line repeated at page boundaries is a running header or footer
+            if line in seen_at_edges:
+                continue
+            seen_at_edges.add(line)
+        blocks[-1][2].append(line)
+    return blocks
+
+
+def segment_cv(cv_text: str) -> dict[str, list[str]]:
+    """Split CV text into normalized lines per section; text before the first heading is contact"""
+    sections: dict[str, list[str]] = {name: [] for name in SECTION_ORDER}
+    for section, _, lines in segment_blocks(cv_text):
+        sections[section].extend(lines)
+    return sections
+
+
+def compact_cv(cv_text: str, token_budget: int = DEFAULT_TOKEN_BUDGET, keep_other: bool = KEEP_OTHER) -> tuple[str, CompactionStats]:
+    """
+    Compact CV text to about `token_budget` estimated tokens (0 disables the budget).
+    Experience and education are kept whole even when they alone exceed the budget; the
+    other sections fill what is left in priority order, and a cut one ends with a
+    "[truncated]" line. The `other` section is filled last, and left out entirely when
+    `keep_other` is off. Returns the text and its token accounting.
+    """
+    sections = segment_cv(cv_text)
+    kept: dict[str, list[str]] = {}
+    dropped: list[str] = []
+    remaining = token_budget if token_budget > 0 else None
+    for name in SECTION_PRIORITY:
+        lines = sections[name]
+        if not lines:
+            continue
+        if name == "other" and not keep_other:
+            dropped.append(name)
+            continue
+        if remaining is None:
+            kept[name] = lines
+            continue
+        if name in WHOLE_SECTIONS:
+            kept[name] = lines
+            remaining = max(remaining - sum(estimate_tokens(line) + 1 for line in lines), 0)
+            continue
+        take: list[str] = []
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                break
+            take.append(line)
+            remaining -= cost
+        # A lone heading is not worth its tokens
+        if len(take) > 1 or (take and name == "contact"):
+            kept[name] = take
+        if len(take) < len(lines):
+            dropped.append(name)
+            if name in kept:
+                kept[name].append(TRUNCATED)
+
+    text = "\n".join(line for name in SECTION_ORDER for line in kept.get(name, []))
+    original = estimate_tokens(cv_text)
+    compact = estimate_tokens(text)
+    return text, CompactionStats(
+        original_tokens=original,
+        compact_tokens=compact,
+        saved_tokens=max(original - compact, 0),
+        dropped_sections=dropped,
+    )
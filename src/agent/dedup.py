@@ -0,0 +1,170 @@
+"""
+Near-duplicate CV detection.
+
+Candidates re-apply with lightly edited CVs, or send the same CV under another
+file name. `NearDuplicateIndex` keeps a MinHash signature of every screened CV
+(word 3-shingles of the normalized extracted text) and an LSH table of signature
+bands in SQLite, so finding the CVs similar to a new one touches a handful of
+buckets instead of the whole history. Candidates from the buckets are verified
+against `threshold` on the estimated Jaccard similarity of their shingles, and
+must carry the same contact email: CVs built from one template by different
+people are similar text, not the same candidate. A CV without an email never
+matches.
+
+Batch screening uses it to fan one screening out to near-duplicates within a
+batch, to reuse the stored result of a near-duplicate already screened for the
+same requisition, and to flag CVs already seen in other requisitions.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+from array import array
+from typing import Optional
+
+from src.agent.cache import connect
+from src.agent.pdf import get_cv_text
+from src.agent.ranking import tokenize
+
+
+DEFAULT_INDEX_PATH = ".cache/near_duplicates.sqlite"
+DEFAULT_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.42 similarity share a bucket with high probability
+BANDS = 32
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """Hashed word `size`-grams of the normalized text"""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {_hash64(" ".join(tokens).encode())} if tokens else set()
+    return {_hash64(" ".join(tokens[i:i + size]).encode()) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(text: str) -> array:
+    """MinHash signature (`NUM_PERM` values) of the text's shingles"""
+    hashed = shingles(text)
+    if not hashed:
+        return array("Q", [_PRIME] * NUM_PERM)
+    return array("Q", (min((a * h + b) % _PRIME for h in hashed) for a, b in _PERMUTATIONS))
+
+
+def contact_key(text: str) -> str:
+    """First email address in the text, lowercased ("" if there is none)"""
+    match = EMAIL_RE.search(text)
+    return match.group(0).lower().rstrip(".") if match else ""
+
+
+def similarity(left: array, right: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+def _band_keys(signature: array) -> list[tuple[int, int]]:
+    rows = len(signature) // BANDS
+    return [
+        (band, _hash64(signature[band * rows:(band + 1) * rows].tobytes()) - (1 << 63))
+        for band in range(BANDS)
+    ]
+
+
+class NearDuplicateIndex:
+    """
+    SQLite-backed MinHash/LSH index of CV texts keyed by CV hash.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._signatures: dict[str, tuple[array, str]] = {}
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS signatures (
+                cv_hash TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                contact TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                cv_hash TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, cv_hash)
+            )"""
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, threshold: Optional[float] = None) -> Optional["NearDuplicateIndex"]:
+        """
+        Index at `NEAR_DUPLICATE_INDEX_PATH` with `NEAR_DUPLICATE_THRESHOLD` (default 0.9);
+        None when the path is set to an empty string.
+        """
+        path = os.getenv("NEAR_DUPLICATE_INDEX_PATH", DEFAULT_INDEX_PATH)
+        if not path:
+            return None
+        return cls(path, DEFAULT_THRESHOLD if threshold is None else threshold)
+
+    def _load(self, cv_hash: str) -> Optional[tuple[array, str]]:
+        entry = self._signatures.get(cv_hash)
+        if entry is None:
+            row = self._conn.execute("SELECT signature, contact FROM signatures WHERE cv_hash = ?", (cv_hash,)).fetchone()
+            if row is None:
+                return None
+            entry = self._signatures[cv_hash] = (array("Q", row[0]), row[1])
+        return entry
+
+    def add(self, cv_hash: str, text: Optional[str] = None) -> tuple[array, str]:
+        """Index a CV (its cached text unless `text` is given); returns its signature and contact key"""
+        with self._lock:
+            entry = self._load(cv_hash)
+            if entry is not None:
+                return entry
+        text = get_cv_text(cv_hash) if text is None else text
+        signature, contact = minhash(text), contact_key(text)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO signatures VALUES (?, ?, ?)", (cv_hash, signature.tobytes(), contact))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets VALUES (?, ?, ?)",
+                [(band, bucket, cv_hash) for band, bucket in _band_keys(signature)],
+            )
+            self._conn.commit()
+            self._signatures[cv_hash] = (signature, contact)
+        return signature, contact
+
+    def query(self, cv_hash: str, threshold: Optional[float] = None) -> list[tuple[str, float]]:
+        """
+        Indexed CVs at least `threshold` similar to `cv_hash` (which is indexed first) with the same
+        contact email, most similar first; none when the CV has no email to confirm the candidate.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature, contact = self.add(cv_hash)
+        if not contact:
+            return []
+        keys = _band_keys(signature)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT cv_hash FROM lsh_buckets WHERE (band, bucket) IN (VALUES {', '.join(['(?, ?)'] * len(keys))})",
+                [value for key in keys for value in key],
+            ).fetchall()
+            candidates = [(other, self._load(other)) for (other,) in rows if other != cv_hash]
+        matches = [
+            (other, similarity(signature, entry[0]))
+            for other, entry in candidates
+            if entry is not None and entry[1] == contact
+        ]
+        return sorted(((other, score) for other, score in matches if score >= threshold), key=lambda m: -m[1])
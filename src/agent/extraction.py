@@ -0,0 +1,185 @@
+"""
+Process-pool PDF text extraction for bulk ingestion.
+
+`pypdf` parsing is pure Python and CPU-bound, so threads serialize on the GIL.
+`extract_many` fans files (and page ranges of large files) out to worker
+processes, a bounded window at a time, registers each text in the CV text cache
+as soon as it is complete and yields results in completion order, ready for
+`prescreening_analysis`.
+"""
+import io
+import os
+import signal
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TypedDict
+
+from pypdf import PdfReader
+
+
+DEFAULT_TIMEOUT = 30.0
+SPLIT_BYTES = 2 * 1024 * 1024  # files above this size are split into page ranges
+PAGES_PER_TASK = 8
+# Tasks submitted ahead per worker process: keeps workers busy without queueing the corpus
+IN_FLIGHT_PER_WORKER = 2
+COUNT = -1  # pending-task marker: page count of a large file, see `extract_many`
+
+
+class Extraction(TypedDict):
+    """
+    Outcome of extracting one PDF.
+    """
+    source: str
+    cv_hash: str
+    text: Optional[str]
+    error: Optional[str]
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("PDF extraction timed out")
+
+
+@contextmanager
+def _deadline(timeout: Optional[float]):
+    """
+    On POSIX an interval timer aborts the work after `timeout` seconds, so a
+    pathological file frees its worker instead of stalling it.
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _extract_pages(data: bytes, start: int, stop: Optional[int], timeout: Optional[float]) -> str:
+    """Worker entry point: extract pages [start, stop) of a PDF"""
+    with _deadline(timeout):
+        reader = PdfReader(io.BytesIO(data))
+        return "\n\n".join(page.extract_text() for page in reader.pages[start:stop])
+
+
+def _count_pages(data: bytes, timeout: Optional[float]) -> int:
+    """Worker entry point: page count of a large PDF, parsed under the same deadline as extraction"""
+    with _deadline(timeout):
+        return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def _page_ranges(pages: Optional[int]) -> list[tuple[int, Optional[int]]]:
+    """PAGES_PER_TASK-sized ranges, or the whole document when the page count is unknown"""
+    if not pages:
+        return [(0, None)]
+    return [(start, min(start + PAGES_PER_TASK, pages)) for start in range(0, pages, PAGES_PER_TASK)]
+
+
+def extract_many(
+    sources: Iterable[str | Path],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> Iterator[Extraction]:
+    """
+    Extract many PDFs across `max_workers` processes (default: all cores).
+    Files whose hash is already in the CV text cache are yielded without parsing.
+    Failures (corrupt files, timeouts) are yielded with `error` set.
+    At most `IN_FLIGHT_PER_WORKER` tasks per worker are submitted at a time, and files are
+    only read when there is room: memory stays bounded and a slow consumer pauses parsing.
+    """
+    from src.agent.pdf import CV_TEXT_CACHE, hash_pdf
+
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # future -> (source, CV hash, chunk index; COUNT for the page count of a large file)
+        pending: dict[Future, tuple[str, str, int]] = {}
+        chunks: dict[str, list[Optional[str]]] = {}
+        counting: dict[str, bytes] = {}
+        failed: set[str] = set()
+
+        def split(source: str, cv_hash: str, data: bytes, pages: Optional[int]) -> None:
+            ranges = _page_ranges(pages)
+            chunks[source] = [None] * len(ranges)
+            for i, (start, stop) in enumerate(ranges):
+                pending[pool.submit(_extract_pages, data, start, stop, timeout)] = (source, cv_hash, i)
+
+        def completed() -> Iterator[Extraction]:
+            """Wait for at least one task and yield the files it completes"""
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, cv_hash, i = pending.pop(future)
+                if i == COUNT:
+                    # A file that cannot be counted in time is extracted as one task
+                    split(source, cv_hash, counting.pop(source), None if future.exception() else future.result())
+                    continue
+                if source in failed:
+                    continue
+                try:
+                    chunks[source][i] = future.result()
+                except Exception as e:
+                    failed.add(source)
+                    del chunks[source]
+                    yield Extraction(source=source, cv_hash=cv_hash, text=None, error=f"Error extracting text from PDF: {e}")
+                    continue
+                parts = chunks[source]
+                if all(part is not None for part in parts):
+                    text = "\n\n".join(parts)
+                    CV_TEXT_CACHE.put(cv_hash, text)
+                    del chunks[source]
+                    yield Extraction(source=source, cv_hash=cv_hash, text=text, error=None)
+
+        for source in sources:
+            source = str(source)
+            while len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                yield from completed()
+            try:
+                data = Path(source).read_bytes()
+                cv_hash = hash_pdf(data)
+            except Exception as e:
+                yield Extraction(source=source, cv_hash="", text=None, error=f"Error extracting text from PDF: {e}")
+                continue
+            cached = CV_TEXT_CACHE.get(cv_hash)
+            if cached is not None:
+                yield Extraction(source=source, cv_hash=cv_hash, text=cached, error=None)
+                continue
+            if len(data) > SPLIT_BYTES:
+                # Even counting pages parses the PDF: done by a worker, under the timeout
+                counting[source] = data
+                pending[pool.submit(_count_pages, data, timeout)] = (source, cv_hash, COUNT)
+            else:
+                split(source, cv_hash, data, None)
+
+        while pending:
+            yield from completed()
+
+
+def extract_with_pool(pool: ProcessPoolExecutor, source: str | Path, timeout: Optional[float] = DEFAULT_TIMEOUT) -> str:
+    """
+    Register one PDF, parsing its page ranges on `pool`, and return its CV hash.
+    Streaming counterpart of `extract_many` for callers that receive files one at a time.
+    """
+    from src.agent.pdf import CV_TEXT_CACHE, hash_pdf
+
+    try:
+        data = Path(source).read_bytes()
+        cv_hash = hash_pdf(data)
+        if cv_hash in CV_TEXT_CACHE:
+            return cv_hash
+        pages = None
+        if len(data) > SPLIT_BYTES:
+            try:
+                pages = pool.submit(_count_pages, data, timeout).result()
+            except Exception:
+                pass  # extracted as one task, which fails on its own if the file is broken
+        futures = [pool.submit(_extract_pages, data, start, stop, timeout) for start, stop in _page_ranges(pages)]
+        try:
+            text = "\n\n".join(future.result() for future in futures)
+        finally:
+            for future in futures:
+                future.cancel()
+    except Exception as e:
+        raise Exception(f"Error extracting text from PDF: {e}")
+    CV_TEXT_CACHE.put(cv_hash, text)
+    return cv_hash
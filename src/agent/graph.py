@@ -1,32 +1,120 @@
+import os
 from langgraph.graph import START, StateGraph, END
-from IPython.display import Image, display
-from src.agent.nodes import prescreening_analysis, skills_analysis, router1, router2, interview, phone_screen, reject
+from langchain_core.runnables import RunnableLambda
+from src.agent.nodes import (
+    knockout_filter, aknockout_filter, knockout_router,
+    prescreening_analysis, aprescreening_analysis,
+    skills_analysis, askills_analysis,
+    fused_screening, afused_screening,
+    reject, areject, defer_rejection,
+    router1, router2, fused_router, interview, phone_screen,
+)
+from src.agent.knockouts import KNOCKOUTS_ENABLED
 from src.agent.state import SharedState
+from src.agent.metrics import instrument_node
 
 
-builder = StateGraph(SharedState)
+SCREENING_MODES = ("staged", "fused")
+REJECTION_MODES = ("inline", "deferred")
 
 
-builder.add_node("prescreening_analysis", prescreening_analysis)
-builder.add_node("skills_analysis", skills_analysis)
-builder.add_node("interview", interview)
-builder.add_node("phone_screen", phone_screen)
-builder.add_node("reject", reject)  
+def node(name: str, func, afunc=None):
+    """Graph node with timing/error metrics (see src/agent/metrics.py), sync and optional async implementation"""
+    if afunc is None:
+        return instrument_node(name, func)
+    return RunnableLambda(instrument_node(name, func), afunc=instrument_node(name, afunc))
 
-builder.add_edge(START, "prescreening_analysis")
-builder.add_conditional_edges("prescreening_analysis", router1, {
-    "skills_analysis": "skills_analysis",
-    "reject": "reject"
-})
-builder.add_conditional_edges("skills_analysis", router2, {
-    "Interview": "interview",
-    "Phone Screen": "phone_screen",
-    "Rejected": "reject"
-})
-builder.add_edge("reject", END)
-builder.add_edge("interview", END)
-builder.add_edge("phone_screen", END)
-graph = builder.compile()
 
+def build_graph(mode: str | None = None, checkpointer=None, rejections: str | None = None,
+                knockouts: bool | None = None):
+    """
+    Build and compile the screening graph, optionally with a checkpointer
+    (the batch engine uses a SQLite one so interrupted runs can resume).
 
-display(Image(graph.get_graph().draw_mermaid_png()))
\ No newline at end of file
+    `mode` (default: the SCREENING_MODE environment variable, else "staged"):
+    - "staged": prescreening_analysis -> skills_analysis, two LLM round trips for passing candidates
+    - "fused": one fused_screening call returns the prescreening fields and skills_analysis together;
+      router1/router2 are still applied locally
+
+    `rejections` (default: the REJECTION_MODE environment variable, else "inline"):
+    - "inline": `reject` writes each rejection reason with its own LLM call
+    - "deferred": `reject` leaves the reason for a batched post-pass (bulk screening)
+    Pre-screening failures get a templated reason in both modes.
+
+    `knockouts` (default: LOCAL_KNOCKOUTS, on unless set to 0): start with `knockout_filter`,
+    which sends candidates that certainly fail a JD knockout straight to `reject` without an LLM call.
+    """
+    mode = mode or os.getenv("SCREENING_MODE", "staged")
+    if mode not in SCREENING_MODES:
+        raise ValueError(f"Invalid screening mode: {mode}")
+    rejections = rejections or os.getenv("REJECTION_MODE", "inline")
+    if rejections not in REJECTION_MODES:
+        raise ValueError(f"Invalid rejection mode: {rejections}")
+    knockouts = KNOCKOUTS_ENABLED if knockouts is None else knockouts
+
+    builder = StateGraph(SharedState)
+
+    # LLM-bound nodes carry both implementations: `graph.invoke` runs the sync one,
+    # `graph.ainvoke` and the LangGraph server run the async one on the event loop.
+    builder.add_node("interview", node("interview", interview))
+    builder.add_node("phone_screen", node("phone_screen", phone_screen))
+    if rejections == "deferred":
+        builder.add_node("reject", node("reject", defer_rejection))
+    else:
+        builder.add_node("reject", node("reject", reject, areject))
+
+    if mode == "fused":
+        first = "fused_screening"
+        builder.add_node("fused_screening", node("fused_screening", fused_screening, afused_screening))
+        builder.add_conditional_edges("fused_screening", fused_router, {
+            "Interview": "interview",
+            "Phone Screen": "phone_screen",
+            "Rejected": "reject"
+        })
+    else:
+        first = "prescreening_analysis"
+        builder.add_node("prescreening_analysis", node("prescreening_analysis", prescreening_analysis, aprescreening_analysis))
+        builder.add_node("skills_analysis", node("skills_analysis", skills_analysis, askills_analysis))
+        builder.add_conditional_edges("prescreening_analysis", router1, {
+            "skills_analysis": "skills_analysis",
+            "reject": "reject"
+        })
+        builder.add_conditional_edges("skills_analysis", router2, {
+            "Interview": "interview",
+            "Phone Screen": "phone_screen",
+            "Rejected": "reject"
+        })
+
+    if knockouts:
+        builder.add_node("knockout_filter", node("knockout_filter", knockout_filter, aknockout_filter))
+        builder.add_edge(START, "knockout_filter")
+        builder.add_conditional_edges("knockout_filter", knockout_router, {
+            "screen": first,
+            "reject": "reject"
+        })
+    else:
+        builder.add_edge(START, first)
+
+    builder.add_edge("reject", END)
+    builder.add_edge("interview", END)
+    builder.add_edge("phone_screen", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+graph = build_graph()
+
+
+def draw_graph(output_path: str | None = None, **kwargs) -> bytes:
+    """
+    Render the graph as a Mermaid PNG (opt-in; by default this calls the remote
+    mermaid.ink renderer, pass `draw_method=MermaidDrawMethod.PYPPETEER` to render locally).
+    Writes the PNG to `output_path` if given, otherwise displays it when running under IPython.
+    """
+    png = graph.get_graph().draw_mermaid_png(**kwargs)
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(png)
+    else:
+        from IPython.display import Image, display
+        display(Image(png))
+    return png
@@ -0,0 +1,338 @@
+"""
+Continuous screening of a watched inbox.
+
+`InboxPipeline` polls a directory for new PDFs and pushes each one through a
+chain of stages connected by bounded queues:
+
+    extract -> screen -> skills -> decide -> sink
+                  \\__________________/^
+
+- extract: PDF parsing on a process pool (see src/agent/extraction.py)
+- screen: the local knockout rules (src/agent/knockouts.py), then `prescreening_analysis`
+  (or `fused_screening` with SCREENING_MODE=fused) for candidates they do not reject
+- skills: `skills_analysis`
+- decide: the terminal node chosen by the routers (`reject` writes the reason)
+- sink: result store, JSONL output, and the PDF moved to `processed/` or `failed/`
+
+Every stage has its own worker threads. A full queue blocks its producers, up to
+the watcher, which stops picking up files, so a burst of arrivals waits on disk
+instead of in memory, and slow LLM stages never hold up parsing.
+
+Usage:
+    python -m src.agent.ingest --inbox inbox/ --jd jd.txt
+    python -m src.agent.ingest --inbox inbox/ --jd jd.txt --once   # drain the inbox and exit
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.agent import knockouts, metrics, nodes
+from src.agent.batch import initial_state
+from src.agent.extraction import extract_with_pool
+from src.agent.jd import compile_jd
+from src.agent.ratelimit import BATCH, priority
+from src.agent.results import ResultStore, ScreeningResult
+from src.agent.state import SharedState
+
+
+STAGES = ("extract", "screen", "skills", "decide", "sink")
+
+_STOP = object()
+
+
+class _Item:
+    """One CV travelling through the pipeline"""
+
+    __slots__ = ("path", "state", "decision", "error")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.state: Optional[SharedState] = None
+        self.decision: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable[[_Item], str], workers: int, queue_size: int):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.threads: list[threading.Thread] = []
+        self.busy = 0
+        self.done = 0
+
+
+class InboxPipeline:
+    """
+    Watch `inbox` and screen every PDF dropped into it against one JD.
+    `workers` maps stage names to worker counts; every queue holds at most `queue_size` CVs.
+    """
+
+    def __init__(
+        self,
+        inbox: str | Path,
+        jd_text: str,
+        workers: Optional[dict[str, int]] = None,
+        queue_size: int = 32,
+        result_store: Optional[ResultStore] = None,
+        out_path: Optional[str] = None,
+        on_result: Optional[Callable[[ScreeningResult], None]] = None,
+        mode: Optional[str] = None,
+    ):
+        self.inbox = Path(inbox)
+        self.processed = self.inbox / "processed"
+        self.failed = self.inbox / "failed"
+        self.jd_text = jd_text
+        self.jd_id: Optional[str] = None
+        self.result_store = result_store
+        self.out_path = out_path
+        self.on_result = on_result
+        self.fused = (mode or os.getenv("SCREENING_MODE", "staged")) == "fused"
+        self.knockouts = knockouts.KNOCKOUTS_ENABLED
+        workers = {"extract": os.cpu_count() or 4, "screen": 8, "skills": 8, "decide": 4, "sink": 1, **(workers or {})}
+        self.stages = {
+            name: _Stage(name, getattr(self, f"_{name}"), workers[name], queue_size) for name in STAGES
+        }
+        self._claimed: set[Path] = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._nodes = {
+            name: metrics.instrument_node(name, func)
+            for name, func in (
+                ("knockout_filter", nodes.knockout_filter),
+                ("prescreening_analysis", nodes.prescreening_analysis),
+                ("fused_screening", nodes.fused_screening),
+                ("skills_analysis", nodes.skills_analysis),
+                ("interview", nodes.interview),
+                ("phone_screen", nodes.phone_screen),
+                ("reject", nodes.reject),
+            )
+        }
+
+    # Stages: each returns the name of the stage the item goes to next
+
+    def _extract(self, item: _Item) -> str:
+        item.state = initial_state(self.jd_id, extract_with_pool(self._pool, item.path))
+        return "screen"
+
+    def _screen(self, item: _Item) -> str:
+        if self.knockouts:
+            item.state = self._nodes["knockout_filter"](item.state)
+            if nodes.knockout_router(item.state) == "reject":
+                item.decision = "Rejected"
+                return "decide"
+        if self.fused:
+            item.state = self._nodes["fused_screening"](item.state)
+            item.decision = nodes.fused_router(item.state)
+            return "decide"
+        item.state = self._nodes["prescreening_analysis"](item.state)
+        if nodes.router1(item.state) == "reject":
+            item.decision = "Rejected"
+            return "decide"
+        return "skills"
+
+    def _skills(self, item: _Item) -> str:
+        item.state = self._nodes["skills_analysis"](item.state)
+        item.decision = nodes.router2(item.state)
+        return "decide"
+
+    def _decide(self, item: _Item) -> str:
+        node = {"Interview": "interview", "Phone Screen": "phone_screen", "Rejected": "reject"}[item.decision]
+        item.state = self._nodes[node](item.state)
+        return "sink"
+
+    def _move(self, path: Path, target_dir: Path) -> Path:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / path.name
+        if target.exists():
+            target = target_dir / f"{path.stem}-{time.time_ns()}{path.suffix}"
+        path.replace(target)
+        return target
+
+    def _append_out(self, result: ScreeningResult) -> None:
+        if self.out_path:
+            with open(self.out_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+
+    def _sink(self, item: _Item) -> str:
+        location = str(item.path)
+        try:
+            if item.error is not None or item.state is None:
+                result = ScreeningResult.from_error(location, item.error or Exception("No result"), self.jd_id)
+            else:
+                result = ScreeningResult.from_state(location, item.state, self.jd_id)
+            location = result.file = str(self._move(item.path, self.failed if result.status == "error" else self.processed))
+            if self.result_store is not None:
+                self.result_store.put_many([result])
+            self._append_out(result)
+        except Exception as e:
+            # Storing failed: report the CV as an error rather than dropping it, and get the
+            # PDF out of the inbox if it is still there so it is not picked up in a loop
+            print(f"{item.path.name}: could not record the result ({e})", file=sys.stderr)
+            result = ScreeningResult.from_error(location, e, self.jd_id)
+            try:
+                if item.path.exists():
+                    result.file = str(self._move(item.path, self.failed))
+                self._append_out(result)
+            except Exception as fallback_error:
+                print(f"{item.path.name}: could not write the error record ({fallback_error})", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._claimed.discard(item.path)
+        if self.on_result:
+            self.on_result(result)
+        return ""
+
+    def _work(self, stage: _Stage) -> None:
+        # LLM calls of the service yield to interactive ones in the same process
+        with priority(BATCH):
+            while True:
+                item = stage.queue.get()
+                if item is _STOP:
+                    return
+                with self._lock:
+                    stage.busy += 1
+                try:
+                    next_stage = stage.func(item)
+                except Exception as e:
+                    item.error = e
+                    next_stage = "sink" if stage.name != "sink" else ""
+                finally:
+                    with self._lock:
+                        stage.busy -= 1
+                        stage.done += 1
+                if next_stage:
+                    # Blocks while the next stage is saturated: backpressure up to the watcher
+                    self.stages[next_stage].queue.put(item)
+
+    def stats(self) -> dict:
+        """Queued, in-progress and completed CVs per stage"""
+        with self._lock:
+            return {
+                name: {"queued": stage.queue.qsize(), "busy": stage.busy, "done": stage.done, "workers": stage.workers}
+                for name, stage in self.stages.items()
+            }
+
+    def _scan(self, sizes: dict[Path, int]) -> int:
+        """Queue the PDFs whose size stayed the same since the previous scan; returns how many are still settling"""
+        for path in sorted(p for p in self.inbox.iterdir() if p.is_file() and p.suffix.lower() == ".pdf"):
+            with self._lock:
+                if path in self._claimed:
+                    continue
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            # A file still being copied into the inbox changes size between scans
+            if sizes.get(path) != size:
+                sizes[path] = size
+                continue
+            del sizes[path]
+            with self._lock:
+                self._claimed.add(path)
+            self.stages["extract"].queue.put(_Item(path))
+            if self._stopping.is_set():
+                break
+        return len(sizes)
+
+    def start(self) -> None:
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        with priority(BATCH):
+            self.jd_id = compile_jd(self.jd_text, nodes.get_llm())["jd_hash"]
+        self._pool = ProcessPoolExecutor(max_workers=self.stages["extract"].workers)
+        for stage in self.stages.values():
+            for i in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(stage,), name=f"ingest-{stage.name}-{i}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+
+    def run(self, poll_seconds: float = 1.0, once: bool = False) -> None:
+        """
+        Watch the inbox until `stop()` (or, with `once`, until the files present at start are queued),
+        then drain the pipeline.
+        """
+        self.start()
+        sizes: dict[Path, int] = {}
+        try:
+            while not self._stopping.is_set():
+                settling = self._scan(sizes)
+                if once and not settling and not sizes:
+                    break
+                self._stopping.wait(poll_seconds)
+        finally:
+            self.drain()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def drain(self) -> None:
+        """Let every queued CV finish, stage by stage, then stop the workers"""
+        for name in STAGES:
+            stage = self.stages[name]
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+            stage.threads.clear()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def print_result(result: ScreeningResult) -> None:
+    outcome = f"error ({result.error})" if result.status == "error" else result.final_decision
+    print(f"{Path(result.file).name}: {outcome}", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Screen CV PDFs as they arrive in a directory.")
+    parser.add_argument("--inbox", required=True, help="Directory watched for new PDFs")
+    parser.add_argument("--jd", required=True, help="Path to a text file with the job description")
+    parser.add_argument("--out", default=None, help="Append one JSON record per screened CV to this file")
+    parser.add_argument("--results-db", default=os.getenv("RESULTS_DB_PATH", ".cache/results.sqlite"),
+                        help="SQLite result store ('' to disable)")
+    parser.add_argument("--extract-workers", type=int, default=None, help="PDF parsing processes (default: all cores)")
+    parser.add_argument("--screen-workers", type=int, default=8, help="Concurrent prescreening calls")
+    parser.add_argument("--skills-workers", type=int, default=8, help="Concurrent skills analysis calls")
+    parser.add_argument("--decide-workers", type=int, default=4, help="Concurrent terminal nodes (rejection reasons)")
+    parser.add_argument("--queue-size", type=int, default=32, help="Capacity of every inter-stage queue")
+    parser.add_argument("--poll-seconds", type=float, default=1.0, help="Inbox scan interval")
+    parser.add_argument("--once", action="store_true", help="Screen the PDFs already in the inbox, then exit")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this port (/metrics, /metrics.json)")
+    args = parser.parse_args(argv)
+
+    workers = {"screen": args.screen_workers, "skills": args.skills_workers, "decide": args.decide_workers}
+    if args.extract_workers:
+        workers["extract"] = args.extract_workers
+    pipeline = InboxPipeline(
+        args.inbox,
+        Path(args.jd).read_text(encoding="utf-8"),
+        workers=workers,
+        queue_size=args.queue_size,
+        result_store=ResultStore(args.results_db) if args.results_db else None,
+        out_path=args.out,
+        on_result=print_result,
+    )
+    if args.metrics_port is not None:
+        metrics.serve_metrics(args.metrics_port)
+    try:
+        pipeline.run(args.poll_seconds, once=args.once)
+    except KeyboardInterrupt:
+        # The first Ctrl-C stops the watcher and drains; `run` already did so on its way out
+        pass
+    print(json.dumps(pipeline.stats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+One-time job description compilation.
+
+`compile_jd` turns a raw JD into a versioned `JDProfile` (knockout criteria,
+minimum experience, normalized required/nice-to-have skills) with a single LLM
+call and caches it by JD hash. Prescreening and skills analysis send this
+compact profile instead of the full JD text for every candidate.
+
+JDs are also registered by id (the JD hash, `register_jd`): the graph state
+carries only that `jd_id`, and every state of a requisition resolves the same
+parsed profile through `get_jd_profile`.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.agent.cache import TextCache
+from src.agent.prompts import jd_profile_system_msg
+from src.agent.state import JDProfile
+
+
+# Bump when the prompt or the profile schema changes so stale profiles are recompiled
+JD_PROFILE_VERSION = 1
+
+JD_PROFILE_CACHE = TextCache(os.getenv("JD_PROFILE_CACHE_PATH", ".cache/jd_profiles.sqlite"), table="jd_profiles")
+JD_TEXT_STORE = TextCache(os.getenv("JD_PROFILE_CACHE_PATH", ".cache/jd_profiles.sqlite"), table="jd_text")
+# Parsed profiles by JD id, shared by every state that references the JD
+_profiles: dict[str, JDProfile] = {}
+_compile_locks: dict[str, threading.Lock] = {}
+_compile_locks_guard = threading.Lock()
+# asyncio locks are bound to one event loop: one set per loop
+_acompile_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+
+
+def hash_jd(jd_text: str) -> str:
+    """SHA-256 of the whitespace-normalized JD, so re-pasted copies share a profile"""
+    normalized = re.sub(r"\s+", " ", jd_text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _cache_key(jd_hash: str) -> str:
+    return f"v{JD_PROFILE_VERSION}:{jd_hash}"
+
+
+def _normalize_skills(skills) -> list[str]:
+    seen: dict[str, None] = {}
+    for skill in skills or []:
+        skill = str(skill).strip().lower()
+        if skill:
+            seen.setdefault(skill, None)
+    return list(seen)
+
+
+def _parse_profile(content: str, jd_hash: str) -> JDProfile:
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise Exception(f"Error parsing JD profile response: {str(e)}")
+    return JDProfile(
+        version=JD_PROFILE_VERSION,
+        jd_hash=jd_hash,
+        title=str(data.get("title", "")),
+        knockout_criteria=[str(c) for c in data.get("knockout_criteria", [])],
+        min_years_experience=float(data.get("min_years_experience") or 0),
+        required_skills=_normalize_skills(data.get("required_skills")),
+        nice_to_have_skills=_normalize_skills(data.get("nice_to_have_skills")),
+    )
+
+
+def _messages(jd_text: str) -> list:
+    return [SystemMessage(content=jd_profile_system_msg), HumanMessage(content=jd_text)]
+
+
+def cached_profile(jd_text: str) -> JDProfile | None:
+    """Return the compiled profile for `jd_text` if it is already cached"""
+    value = JD_PROFILE_CACHE.get(_cache_key(hash_jd(jd_text)))
+    return json.loads(value) if value is not None else None
+
+
+def compile_jd(jd_text: str, llm) -> JDProfile:
+    """
+    Compile `jd_text` into a requirements profile, reusing the cached one when available.
+    Concurrent callers for the same JD wait for a single compilation.
+    """
+    jd_hash = register_jd(jd_text)
+    key = _cache_key(jd_hash)
+    with _compile_locks_guard:
+        lock = _compile_locks.setdefault(key, threading.Lock())
+    with lock:
+        value = JD_PROFILE_CACHE.get(key)
+        if value is not None:
+            return json.loads(value)
+        response = llm.invoke(_messages(jd_text))
+        profile = _parse_profile(str(response.content), jd_hash)
+        JD_PROFILE_CACHE.put(key, json.dumps(profile))
+        return profile
+
+
+async def acompile_jd(jd_text: str, llm) -> JDProfile:
+    """Async variant of `compile_jd`; concurrent tasks for the same JD likewise share one compilation"""
+    jd_hash = await asyncio.to_thread(register_jd, jd_text)
+    key = _cache_key(jd_hash)
+    lock = _acompile_locks.setdefault(asyncio.get_running_loop(), {}).setdefault(key, asyncio.Lock())
+    async with lock:
+        value = await asyncio.to_thread(JD_PROFILE_CACHE.get, key)
+        if value is not None:
+            return json.loads(value)
+        response = await llm.ainvoke(_messages(jd_text))
+        profile = _parse_profile(str(response.content), jd_hash)
+        await asyncio.to_thread(JD_PROFILE_CACHE.put, key, json.dumps(profile))
+        return profile
+
+
+def register_jd(jd_text: str) -> str:
+    """Store the JD text once and return its id (the JD hash) for `SharedState.jd_id`"""
+    jd_id = hash_jd(jd_text)
+    if jd_id not in JD_TEXT_STORE:
+        JD_TEXT_STORE.put(jd_id, jd_text)
+    return jd_id
+
+
+def get_jd_text(jd_id: str) -> str:
+    """Text of a registered JD"""
+    jd_text = JD_TEXT_STORE.get(jd_id)
+    if jd_text is None:
+        raise Exception(f"No job description registered for {jd_id}; register it with register_jd first")
+    return jd_text
+
+
+def get_jd_profile(jd_id: str, llm=None) -> JDProfile:
+    """Profile of a registered JD: parsed once per process, compiled with `llm` if it never was"""
+    profile = _profiles.get(jd_id)
+    if profile is None:
+        value = JD_PROFILE_CACHE.get(_cache_key(jd_id))
+        if value is not None:
+            profile = json.loads(value)
+        elif llm is not None:
+            profile = compile_jd(get_jd_text(jd_id), llm)
+        else:
+            raise Exception(f"Job description {jd_id} has not been compiled")
+        profile = _profiles.setdefault(jd_id, profile)
+    return profile
+
+
+async def aget_jd_profile(jd_id: str, llm=None) -> JDProfile:
+    """Async variant of `get_jd_profile`"""
+    profile = _profiles.get(jd_id)
+    if profile is not None:
+        return profile
+    value = await asyncio.to_thread(JD_PROFILE_CACHE.get, _cache_key(jd_id))
+    if value is not None:
+        profile = json.loads(value)
+    elif llm is not None:
+        profile = await acompile_jd(await asyncio.to_thread(get_jd_text, jd_id), llm)
+    else:
+        raise Exception(f"Job description {jd_id} has not been compiled")
+    return _profiles.setdefault(jd_id, profile)
+
+
+def render_jd_profile(profile: JDProfile, *fields: str) -> str:
+    """Compact JSON of the profile (optionally only `fields`) as sent to the LLM"""
+    keys = fields or ("title", "knockout_criteria", "min_years_experience", "required_skills", "nice_to_have_skills")
+    return json.dumps({k: profile[k] for k in keys}, separators=(",", ":"))
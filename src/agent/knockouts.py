@@ -0,0 +1,251 @@
+"""
+Local knockout rules, checked before any screening call.
+
+`evaluate` compares the compiled JD profile (src/agent/jd.py) with the raw CV
+text using regexes and date parsing only:
+- minimum experience: employment date ranges ("Jan 2019 - Mar 2021",
+  "2018 - Present", "03/2020 - now") outside the education section are merged
+  and summed
+- required degree: knockout criteria naming a degree level (bachelor, master,
+  PhD...) against the highest degree in the education section
+- mandatory certifications: knockout criteria naming a well-known certification
+  (PMP, CISSP, AWS Certified...) against the whole CV
+
+A rule only fails on clear evidence. Sections come from `segment_blocks`
+(src/agent/compaction.py), and a date range or degree under a heading that was
+only guessed from a keyword (or before any heading) leaves the rule undecided,
+as does an education line naming no recognised degree ("Cairo University"
+could be a bachelor's): the held degree is only taken when every education
+line is understood, and experience is only summed when every year in it is
+part of a date range that was read ("Since 2012" is not). No parsable dates,
+unknown certifications, "or equivalent" criteria, criteria where a degree
+abbreviation may be something else ("MS Office", "Boston, MA") and CVs that
+claim enough years in words are undecided too. Undecided
+rules return None and are left to the LLM. Estimates err towards the candidate
+(year-only ranges span whole years, internships count).
+"""
+import os
+import re
+from datetime import date
+from typing import Optional
+
+from src.agent.compaction import segment_blocks
+from src.agent.state import JDProfile
+
+
+KNOCKOUTS_ENABLED = os.getenv("LOCAL_KNOCKOUTS", "1") == "1"
+# Experience must fall short by more than this many years to fail locally
+YEARS_MARGIN = float(os.getenv("KNOCKOUT_YEARS_MARGIN", "0.5"))
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_PRESENT_WORDS = r"present|current|now|today|ongoing|date"
+_PRESENT = rf"(?P<present>{_PRESENT_WORDS})"
+
+
+def _date(prefix: str) -> str:
+    """"Mar 2021", "03/2021" or "2021", with named groups `<prefix>_month` / `_num` / `_year`"""
+    return rf"(?:(?P<{prefix}_month>{_MONTH})\s+|(?P<{prefix}_num>\d{{1,2}})[/.-])?(?P<{prefix}_year>(?:19|20)\d\d)"
+
+
+DATE_RANGE_RE = re.compile(
+    rf"\b{_date('start')}\s*(?:-|–|—|to|until)\s*(?:{_date('end')}|{_PRESENT})\b",
+    re.IGNORECASE,
+)
+CLAIMED_YEARS_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+YEAR_RE = re.compile(r"\b(?:19|20)\d\d\b")
+
+# Degree levels; a criterion requires the lowest level it names ("Bachelor or Master" -> bachelor)
+DEGREE_LEVELS: tuple[tuple[int, str, re.Pattern], ...] = (
+    (0, "high school diploma", re.compile(r"\b(?:high school|secondary school|ged)\b", re.IGNORECASE)),
+    (1, "associate degree", re.compile(r"\bassociate(?:'?s)?\s+(?:degree|of)\b", re.IGNORECASE)),
+    (2, "bachelor's degree", re.compile(
+        r"\b(?:bachelor(?:'?s)?|b\.?\s?sc|b\.?\s?eng|b\.?\s?tech|b\.?\s?[as]\.?|undergraduate degree)(?![\w'])", re.IGNORECASE)),
+    # "Scrum Master" is a certification, not a degree
+    (3, "master's degree", re.compile(
+        r"(?<!scrum )\b(?:master(?:'?s)?|m\.?\s?sc|m\.?\s?eng|m\.?\s?tech|mba|m\.?\s?[as]\.?)(?![\w'])", re.IGNORECASE)),
+    (4, "doctorate", re.compile(r"\b(?:ph\.?\s?d|doctorate|doctoral|d\.?\s?phil)(?![\w'])", re.IGNORECASE)),
+)
+# Only criteria naming a degree are checked against degree levels
+DEGREE_WORD_RE = re.compile(
+    r"\b(?:degree|diploma|bachelor|master|graduate|undergraduate|doctora|ph\.?\s?d|mba|[bm]\.?\s?(?:sc|eng|tech))",
+    re.IGNORECASE,
+)
+# Bare "BS"/"MS"/"BA"/"MA" only read as degrees in a CV: in a criterion they are as likely "MS Office" or "Boston, MA"
+BARE_DEGREE_ABBREVIATION_RE = re.compile(r"\b[bm]\.?\s?[as]\b\.?", re.IGNORECASE)
+# Education lines that carry no degree: dates, GPA, graduation notes
+NON_DEGREE_LINE_RE = re.compile(
+    rf"(?:[\s\d/.,:;|()+%–—-]|\b{_MONTH}|\b(?:{_PRESENT_WORDS}|c?gpa|grade|expected|graduated|graduation|to|until)\b)*",
+    re.IGNORECASE,
+)
+SOFT_CRITERION_RE = re.compile(r"\b(?:equivalent|preferred|plus|desirable|ideally|or similar)\b", re.IGNORECASE)
+
+# Certification -> spellings; a criterion naming several is met by any of them
+CERTIFICATIONS: dict[str, tuple[str, ...]] = {
+    "PMP": ("pmp", "project management professional"),
+    "PRINCE2": ("prince2",),
+    "CPA": ("cpa", "certified public accountant"),
+    "ACCA": ("acca",),
+    "CFA": ("cfa", "chartered financial analyst"),
+    "CISSP": ("cissp",),
+    "CISM": ("cism",),
+    "CISA": ("cisa",),
+    "CEH": ("ceh", "certified ethical hacker"),
+    "OSCP": ("oscp",),
+    "CompTIA Security+": ("security+", "comptia security"),
+    "CCNA": ("ccna",),
+    "CCNP": ("ccnp",),
+    "CKA": ("cka", "certified kubernetes administrator"),
+    "CKAD": ("ckad", "certified kubernetes application developer"),
+    "AWS certification": ("aws certified", "aws certification", "aws solutions architect"),
+    "Azure certification": ("azure certified", "azure certification", "microsoft certified: azure", "az-900", "az-104", "az-204", "az-305"),
+    "Google Cloud certification": ("google cloud certified", "gcp certified", "google cloud certification", "professional cloud architect"),
+    "ITIL": ("itil",),
+    "Scrum Master certification": ("certified scrummaster", "certified scrum master", "csm", "psm"),
+    "Six Sigma": ("six sigma", "lean six sigma"),
+    "RHCE": ("rhce",),
+    "RHCSA": ("rhcsa",),
+}
+CERTIFICATION_RES = {
+    name: re.compile(r"(?<![\w+])(?:" + "|".join(re.escape(s) for s in spellings) + r")(?![\w+])", re.IGNORECASE)
+    for name, spellings in CERTIFICATIONS.items()
+}
+
+
+def _month_index(match: re.Match, prefix: str, end: bool) -> Optional[int]:
+    year = match.group(f"{prefix}_year")
+    if year is None:
+        return None
+    month_name, month_num = match.group(f"{prefix}_month"), match.group(f"{prefix}_num")
+    if month_name:
+        month = MONTHS[month_name[:3].lower()]
+    elif month_num and 1 <= int(month_num) <= 12:
+        month = int(month_num)
+    else:
+        # Year only: the whole year counts
+        month = 12 if end else 1
+    return int(year) * 12 + month - 1
+
+
+def employment_spans(lines: list[str], today: Optional[date] = None) -> list[tuple[int, int]]:
+    """Date ranges in the lines as (first month, month after the last) indexes"""
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    spans = []
+    for line in lines:
+        for match in DATE_RANGE_RE.finditer(line):
+            start = _month_index(match, "start", end=False)
+            stop = now if match.group("present") else _month_index(match, "end", end=True)
+            if start is not None and stop is not None and start <= stop <= now + 12:
+                spans.append((start, min(stop, now) + 1))
+    return spans
+
+
+def total_years(spans: list[tuple[int, int]]) -> float:
+    """Years covered by the spans, overlaps counted once"""
+    months, covered_until = 0, None
+    for start, end in sorted(spans):
+        if covered_until is not None:
+            start = max(start, covered_until)
+            covered_until = max(covered_until, end)
+        else:
+            covered_until = end
+        months += max(end - start, 0)
+    return months / 12
+
+
+def _years_rule(blocks: list[tuple[str, bool, list[str]]], cv_text: str, min_years: float,
+                today: Optional[date]) -> Optional[str]:
+    if min_years <= 0 or any(float(claim) >= min_years for claim in CLAIMED_YEARS_RE.findall(cv_text)):
+        return None
+    experience, lines = [], []
+    for section, known, block_lines in blocks:
+        spans = employment_spans(block_lines, today)
+        if not spans and section != "experience":
+            continue
+        if spans and not known:
+            # Jobs and studies cannot be told apart under a guessed heading
+            return None
+        if section == "experience":
+            experience.extend(block_lines)
+        if section != "education":
+            lines.extend(block_lines)
+    if not employment_spans(experience, today):
+        return None
+    if any(YEAR_RE.search(DATE_RANGE_RE.sub(" ", line)) for line in lines):
+        # A date we could not read as a range ("Since 2012", "2012/06", a range split across lines)
+        # may hide years of experience
+        return None
+    years = total_years(employment_spans(lines, today))
+    if years + YEARS_MARGIN >= min_years:
+        return None
+    return f"at least {min_years:g} years of experience (the CV lists about {years:.1f})"
+
+
+def _degree_level(text: str) -> Optional[int]:
+    """Highest degree level named in `text`, None if it names none"""
+    levels = [level for level, _, pattern in DEGREE_LEVELS if pattern.search(text)]
+    return max(levels) if levels else None
+
+
+def _degree_rule(criterion: str, blocks: list[tuple[str, bool, list[str]]]) -> Optional[str]:
+    if not DEGREE_WORD_RE.search(criterion):
+        return None
+    criterion = BARE_DEGREE_ABBREVIATION_RE.sub(" ", criterion)
+    required = [(level, name) for level, name, pattern in DEGREE_LEVELS if level > 0 and pattern.search(criterion)]
+    if not required:
+        return None
+    level, name = min(required)
+    education: list[str] = []
+    for section, known, block_lines in blocks:
+        body = block_lines if section == "contact" else block_lines[1:]
+        if section == "education":
+            if not known:
+                return None
+            education.extend(body)
+            continue
+        mentioned = [held for held in map(_degree_level, body) if held is not None]
+        # A degree outside a known education section may be the one that counts
+        if mentioned and (not known or max(mentioned) >= level):
+            return None
+    held_levels = []
+    for line in education:
+        held = _degree_level(line)
+        if held is not None:
+            held_levels.append(held)
+        elif not NON_DEGREE_LINE_RE.fullmatch(line):
+            # An institution or degree we cannot read may be the required one
+            return None
+    if not held_levels or max(held_levels) >= level:
+        return None
+    return f"a {name} or higher"
+
+
+def _certification_rule(criterion: str, cv_text: str) -> Optional[str]:
+    named = [name for name, pattern in CERTIFICATION_RES.items() if pattern.search(criterion)]
+    if not named or any(CERTIFICATION_RES[name].search(cv_text) for name in named):
+        return None
+    return f"the {' or '.join(named)} certification"
+
+
+def evaluate(cv_text: str, jd_profile: JDProfile, today: Optional[date] = None) -> Optional[str]:
+    """
+    The first knockout the CV clearly fails, as a requirement for the rejection reason;
+    None when it meets every rule or a rule cannot be decided locally.
+    Only the JD's own requirements are checked: routing policy knockouts (src/agent/policy.py)
+    can change after screening, so they are applied after the LLM, where `reroute` can revisit them.
+    """
+    blocks = segment_blocks(cv_text)
+    failed = _years_rule(blocks, cv_text, jd_profile.get("min_years_experience") or 0, today)
+    if failed is not None:
+        return failed
+    for criterion in jd_profile.get("knockout_criteria") or []:
+        if SOFT_CRITERION_RE.search(criterion):
+            continue
+        failed = _degree_rule(criterion, blocks) or _certification_rule(criterion, cv_text)
+        if failed is not None:
+            return failed
+    return None
@@ -0,0 +1,260 @@
+"""
+Lightweight per-node instrumentation.
+
+`instrument_node` wraps the node functions of the graph and records wall time
+and errors per node. `MetricsCallback` is attached to the chat model and
+attributes every LLM call (prompt/completion tokens, cost, cache hits, errors)
+to the node that made it; retries are reported by the request scheduler.
+Stages outside the graph (PDF extraction) use `timed`.
+
+Everything lands in the process-wide `REGISTRY`, and also in the current
+`track_run()` block if there is one, so a single screening can be inspected:
+- `REGISTRY.summary()`: JSON-serializable totals per node
+- `REGISTRY.prometheus()`: Prometheus text exposition, served by `serve_metrics(port)`
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Latency histogram buckets (seconds)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# USD per million tokens (Groq list price of openai/gpt-oss-120b)
+PRICE_INPUT_PER_M = float(os.getenv("LLM_PRICE_INPUT_PER_M", "0.15"))
+PRICE_OUTPUT_PER_M = float(os.getenv("LLM_PRICE_OUTPUT_PER_M", "0.75"))
+# Small model of the cascade (openai/gpt-oss-20b), see src/agent/cascade.py
+SMALL_PRICE_INPUT_PER_M = float(os.getenv("LLM_SMALL_PRICE_INPUT_PER_M", "0.075"))
+SMALL_PRICE_OUTPUT_PER_M = float(os.getenv("LLM_SMALL_PRICE_OUTPUT_PER_M", "0.30"))
+# Prompt tokens served from the provider's prefix cache are billed at this fraction of the input price
+CACHED_INPUT_PRICE_RATIO = float(os.getenv("LLM_CACHED_INPUT_PRICE_RATIO", "0.5"))
+
+COUNTERS = (
+    "runs", "errors", "llm_calls", "llm_cache_hits", "llm_errors", "llm_retries", "llm_escalations",
+    "prompt_tokens", "cached_prompt_tokens", "completion_tokens",
+)
+
+_node: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("metrics_node", default=None)
+_run: contextvars.ContextVar[Optional["Metrics"]] = contextvars.ContextVar("metrics_run", default=None)
+
+
+def cached_token_ratio(counts: dict) -> float:
+    """Share of prompt tokens the provider served from its prompt-prefix cache"""
+    prompt_tokens = counts["prompt_tokens"]
+    return round(counts["cached_prompt_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+
+
+class NodeStats:
+    """Totals of one node (or stage)"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.seconds = 0.0
+        self.cost_usd = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float) -> None:
+        self.counts["runs"] += 1
+        self.seconds += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def to_dict(self) -> dict:
+        runs = self.counts["runs"]
+        return {
+            **self.counts,
+            "seconds_total": round(self.seconds, 6),
+            "seconds_mean": round(self.seconds / runs, 6) if runs else 0.0,
+            "cached_token_ratio": cached_token_ratio(self.counts),
+            "cost_usd": round(self.cost_usd, 8),
+        }
+
+
+class Metrics:
+    """Thread-safe collection of `NodeStats` keyed by node name"""
+
+    def __init__(self):
+        self.nodes: dict[str, NodeStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, node: str) -> NodeStats:
+        stats = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes[node] = NodeStats()
+        return stats
+
+    def observe(self, node: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._stats(node)
+            stats.observe(seconds)
+            stats.counts["errors"] += error
+
+    def add(self, node: str, cost_usd: float = 0.0, **counts: int) -> None:
+        with self._lock:
+            stats = self._stats(node)
+            stats.cost_usd += cost_usd
+            for name, value in counts.items():
+                stats.counts[name] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.nodes.clear()
+
+    def summary(self) -> dict:
+        """Per-node totals plus an overall `total` entry"""
+        with self._lock:
+            nodes = {name: stats.to_dict() for name, stats in sorted(self.nodes.items())}
+        total = dict.fromkeys(COUNTERS, 0)
+        for stats in nodes.values():
+            for name in COUNTERS:
+                total[name] += stats[name]
+        total["cached_token_ratio"] = cached_token_ratio(total)
+        total["cost_usd"] = round(sum(stats["cost_usd"] for stats in nodes.values()), 8)
+        return {"nodes": nodes, "total": total}
+
+    def prometheus(self, prefix: str = "screening") -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            nodes = sorted(self.nodes.items())
+            lines = []
+            for counter in COUNTERS:
+                metric = f"{prefix}_node_{counter}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f'{metric}{{node="{name}"}} {stats.counts[counter]}' for name, stats in nodes)
+            metric = f"{prefix}_node_cost_usd_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f'{metric}{{node="{name}"}} {stats.cost_usd:.8f}' for name, stats in nodes)
+            metric = f"{prefix}_node_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in nodes:
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    lines.append(f'{metric}_bucket{{node="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{node="{name}",le="+Inf"}} {stats.counts["runs"]}')
+                lines.append(f'{metric}_sum{{node="{name}"}} {stats.seconds:.6f}')
+                lines.append(f'{metric}_count{{node="{name}"}} {stats.counts["runs"]}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Metrics()
+
+
+def _targets() -> list[Metrics]:
+    run = _run.get()
+    return [REGISTRY, run] if run is not None else [REGISTRY]
+
+
+def record(node: Optional[str] = None, cost_usd: float = 0.0, **counts: int) -> None:
+    """Add counters to `node` (default: the node currently running)"""
+    node = node or _node.get() or "unattributed"
+    for metrics in _targets():
+        metrics.add(node, cost_usd, **counts)
+
+
+@contextmanager
+def timed(node: str):
+    """Time a block as a run of `node`; LLM calls inside it are attributed to `node`"""
+    token = _node.set(node)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _node.reset(token)
+        for metrics in _targets():
+            metrics.observe(node, elapsed, error)
+
+
+@contextmanager
+def track_run():
+    """Collect the metrics of the graph run(s) started inside the block into a fresh `Metrics`"""
+    run = Metrics()
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+
+
+def instrument_node(name: str, func: Callable) -> Callable:
+    """Wrap a (sync or async) node function with `timed(name)`"""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state, *args, **kwargs):
+            with timed(name):
+                return await func(state, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state, *args, **kwargs):
+        with timed(name):
+            return func(state, *args, **kwargs)
+    return wrapper
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """Chat model callback recording tokens, cost, cache hits and errors per node"""
+
+    # Run in the caller's context, which carries the current node
+    run_inline = True
+
+    def __init__(self, price_input_per_m: float = PRICE_INPUT_PER_M, price_output_per_m: float = PRICE_OUTPUT_PER_M):
+        self.price_input_per_m = price_input_per_m
+        self.price_output_per_m = price_output_per_m
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                cache_hit = bool((generation.generation_info or {}).get("cache_hit"))
+                prompt_tokens = usage.get("input_tokens", 0)
+                cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                completion_tokens = usage.get("output_tokens", 0)
+                if cache_hit:
+                    record(llm_calls=1, llm_cache_hits=1)
+                    continue
+                billed_input = prompt_tokens - cached_tokens * (1 - CACHED_INPUT_PRICE_RATIO)
+                cost = (billed_input * self.price_input_per_m + completion_tokens * self.price_output_per_m) / 1_000_000
+                record(cost_usd=cost, llm_calls=1, prompt_tokens=prompt_tokens,
+                       cached_prompt_tokens=cached_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        record(llm_calls=1, llm_errors=1)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(REGISTRY.summary()).encode(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = REGISTRY.prometheus().encode(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `/metrics` (Prometheus) and `/metrics.json` from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
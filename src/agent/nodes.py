@@ -1,55 +1,206 @@
+import asyncio
 import os 
+import threading
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
-from src.agent.state import SharedState
-from src.agent.prompts import skills_analysis_system_msg, rejected_system_msg, prescreen_system_msg
+from src.agent.state import SharedState, JDProfile
+from src.agent.prompts import skills_analysis_system_msg, prescreen_system_msg, fused_screening_system_msg
+from src.agent.cache import LLMCache
+from src.agent.ratelimit import RequestScheduler, ScheduledLLM
+from src.agent.metrics import MetricsCallback, SMALL_PRICE_INPUT_PER_M, SMALL_PRICE_OUTPUT_PER_M
 import json
 from pydantic import SecretStr
-from langchain_community.document_loaders import PyPDFLoader
-import tempfile
-import shutil
+from src.agent.pdf import (
+    get_cv_text, aget_cv_text, has_cv_text, ahas_cv_text,
+    register_cv, aregister_cv, register_cv_text, aregister_cv_text,
+)
+from src.agent.jd import compile_jd, acompile_jd, get_jd_profile, aget_jd_profile, render_jd_profile
+from src.agent.skills import match_skills
+from src.agent.compaction import compact_cv
+from src.agent import cascade, knockouts, rejections
+from src.agent.policy import get_policy, route
 
 
 load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-LLM = ChatGroq(model="openai/gpt-oss-120b", temperature=0, api_key=SecretStr(GROQ_API_KEY) if GROQ_API_KEY else None)
+GROQ_MODEL = "openai/gpt-oss-120b"
+# First tier of the model cascade (MODEL_CASCADE=1), see src/agent/cascade.py
+GROQ_SMALL_MODEL = os.getenv("GROQ_SMALL_MODEL", "openai/gpt-oss-20b")
 
+# The client and its cache are built on first use: importing langchain_groq and opening
+# SQLite at import time slowed every Streamlit rerun and server worker start.
+_LLM = None
+_SMALL_LLM = None
+_LLM_CACHE = None
+_SCHEDULERS: dict[str, RequestScheduler] = {}
+_LLM_LOCK = threading.Lock()
 
-def extract_pdf_txt(pdf_path: str) -> str:
-    """Extract text from uploaded PDF file"""
-    try:
-        loader = PyPDFLoader(pdf_path)
-        pages = loader.load()
-        cv_text = "\n\n".join([p.page_content for p in pages]) 
-        return cv_text
-    except Exception as e:
-        raise Exception(f"Error extracting text from PDF: {str(e)}")
 
-def prescreening_analysis(state: SharedState) -> SharedState:
-    """Process user uploaded CV (PDF) and JD (text) for analysis"""
-    # Get CV file path and JD text from state
-    cv_file_path = state["cv_file_path"]
-    jd_text = state["jd_text"]
-    
-    # Extract text from CV PDF
-    cv_text = extract_pdf_txt(cv_file_path)
-    
-    # Create messages for the LLM
+def get_llm_cache() -> LLMCache | None:
+    """Identical (model, temperature, messages) calls are answered from local disk; see src/agent/cache.py"""
+    global _LLM_CACHE
+    with _LLM_LOCK:
+        if _LLM_CACHE is None:
+            _LLM_CACHE = LLMCache.from_env()
+        return _LLM_CACHE
+
+
+def get_scheduler(model: str = GROQ_MODEL) -> RequestScheduler:
+    """
+    Rate limits and priorities shared by every Groq call to `model` in the process (Groq
+    quotas are per model); see src/agent/ratelimit.py
+    """
+    with _LLM_LOCK:
+        if model not in _SCHEDULERS:
+            _SCHEDULERS[model] = RequestScheduler.from_env()
+        return _SCHEDULERS[model]
+
+
+def build_llm(model: str = GROQ_MODEL):
+    """Create the Groq chat client, scheduled and retried by the shared `RequestScheduler`"""
+    from langchain_groq import ChatGroq
+
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    scheduler = get_scheduler(model)
+    callback = MetricsCallback() if model == GROQ_MODEL else MetricsCallback(SMALL_PRICE_INPUT_PER_M, SMALL_PRICE_OUTPUT_PER_M)
+    # Retries are left to the scheduler, which backs off for every caller at once
+    llm = ChatGroq(model=model, temperature=0, api_key=SecretStr(GROQ_API_KEY) if GROQ_API_KEY else None,
+                   cache=get_llm_cache(), rate_limiter=scheduler, max_retries=0, callbacks=[callback])
+    return ScheduledLLM(llm, scheduler, max_retries=int(os.getenv("LLM_MAX_RETRIES", "6")))
+
+
+def get_llm():
+    """The shared chat model, created lazily"""
+    global _LLM
+    if _LLM is None:
+        llm = build_llm()
+        with _LLM_LOCK:
+            if _LLM is None:
+                _LLM = llm
+    return _LLM
+
+
+def set_llm(llm) -> None:
+    """Replace the shared chat model (e.g. with a fake model in benchmarks)"""
+    global _LLM
+    _LLM = llm
+
+
+def get_small_llm():
+    """The first-tier model of the cascade, created lazily"""
+    global _SMALL_LLM
+    if _SMALL_LLM is None:
+        llm = build_llm(GROQ_SMALL_MODEL)
+        with _LLM_LOCK:
+            if _SMALL_LLM is None:
+                _SMALL_LLM = llm
+    return _SMALL_LLM
+
+
+def set_small_llm(llm) -> None:
+    """Replace the first-tier model of the cascade"""
+    global _SMALL_LLM
+    _SMALL_LLM = llm
+
+
+def screening_invoke(messages: list, accept: cascade.Accept):
+    """Screening call: through the model cascade when MODEL_CASCADE=1, else the large model"""
+    if not cascade.CASCADE_ENABLED:
+        return get_llm().invoke(messages)
+    return cascade.invoke(get_small_llm(), get_llm(), messages, accept)
+
+
+async def ascreening_invoke(messages: list, accept: cascade.Accept):
+    """Async variant of `screening_invoke`"""
+    if not cascade.CASCADE_ENABLED:
+        return await get_llm().ainvoke(messages)
+    return await cascade.ainvoke(get_small_llm(), get_llm(), messages, accept)
+
+
+def __getattr__(name: str):
+    # `nodes.LLM` / `nodes.LLM_CACHE` keep working without eager construction
+    if name == "LLM":
+        return get_llm()
+    if name == "LLM_CACHE":
+        return get_llm_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# State fields a (pre)screening response may set
+SCREENING_RESPONSE_FIELDS = (
+    "name", "email", "phone", "years_of_experience", "skills", "pre_screening_status",
+    "skills_analysis", "final_decision", "rejection_reason",
+)
+
+
+def compact_cv_text(state: SharedState, cv_text: str) -> str:
+    """Section-aware, token-budgeted CV text for the prompt; token savings are recorded in the state"""
+    compact_text, stats = compact_cv(cv_text)
+    state["cv_compaction"] = stats
+    return compact_text
+
+
+def prescreening_messages(cv_text: str, jd_profile: JDProfile, system_msg: str = prescreen_system_msg) -> list:
+    """
+    Build the prescreening prompt: system message, compiled JD profile, CV text.
+    The first two are identical for every candidate of a requisition, so the provider
+    can serve that prefix from its prompt cache; only the CV differs.
+    """
+    sys_message = SystemMessage(content=system_msg)
+    jd_message = HumanMessage(content=render_jd_profile(jd_profile))
     cv_message = HumanMessage(content=cv_text)
-    jd_message = HumanMessage(content=jd_text)
-    sys_message = SystemMessage(content=prescreen_system_msg)
-    
-    messages = [sys_message, cv_message, jd_message]
-    
-    response = LLM.invoke(messages)
-    
+    return [sys_message, jd_message, cv_message]
+
+
+def jd_profile_for(state: SharedState) -> JDProfile:
+    """
+    Profile of the state's JD, shared by every state of the requisition.
+    States started with raw `jd_text` (LangGraph server inputs) are registered on first use.
+    """
+    if not state.get("jd_id"):
+        state["jd_id"] = compile_jd(state["jd_text"], get_llm())["jd_hash"]
+    return get_jd_profile(state["jd_id"], get_llm())
+
+
+async def ajd_profile_for(state: SharedState) -> JDProfile:
+    """Async variant of `jd_profile_for`"""
+    if not state.get("jd_id"):
+        state["jd_id"] = (await acompile_jd(state["jd_text"], get_llm()))["jd_hash"]
+    return await aget_jd_profile(state["jd_id"], get_llm())
+
+
+def cv_text_for(state: SharedState) -> str:
+    """
+    Extracted text of the state's CV.
+    States started with a server-side `cv_file_path` or raw `cv_text` (LangGraph server
+    inputs) are registered on first use and carry the resulting `cv_hash` from then on.
+    """
+    if not (state.get("cv_hash") and has_cv_text(state["cv_hash"])):
+        if state.get("cv_file_path"):
+            state["cv_hash"] = register_cv(state["cv_file_path"])
+        elif state.get("cv_text"):
+            state["cv_hash"] = register_cv_text(state["cv_text"])
+    return get_cv_text(state.get("cv_hash") or "")
+
+
+async def acv_text_for(state: SharedState) -> str:
+    """Async variant of `cv_text_for`; PDF parsing runs in a worker thread"""
+    if not (state.get("cv_hash") and await ahas_cv_text(state["cv_hash"])):
+        if state.get("cv_file_path"):
+            state["cv_hash"] = await aregister_cv(state["cv_file_path"])
+        elif state.get("cv_text"):
+            state["cv_hash"] = await aregister_cv_text(state["cv_text"])
+    return await aget_cv_text(state.get("cv_hash") or "")
+
+
+def apply_prescreening_response(state: SharedState, response) -> SharedState:
+    """
+    Merge the prescreening JSON returned by the LLM into the state.
+    Only the response fields are taken: the model must not overwrite ids or inputs such as `jd_id`.
+    """
     try:
         data = json.loads(str(response.content))
-        state.update(data)
-        # Ensure JD text is stored in state for skills analysis
-        state["jd_text"] = jd_text
-        
+        state.update({k: v for k, v in data.items() if k in SCREENING_RESPONSE_FIELDS})
+
     except json.JSONDecodeError as e:
         raise Exception(f"Error parsing LLM response: {str(e)}")
     except KeyError as e:
@@ -57,17 +208,126 @@ def prescreening_analysis(state: SharedState) -> SharedState:
 
     return state
 
-def skills_analysis(state: SharedState) -> SharedState:
+
+def apply_knockouts(state: SharedState, cv_text: str, jd_profile: JDProfile) -> SharedState:
+    """
+    Fail pre-screening locally when the CV clearly misses a knockout; `reject` then explains which.
+    A reason left by an earlier run on the same checkpoint thread is cleared when no rule fails.
+    """
+    failed = knockouts.evaluate(cv_text, jd_profile)
+    if failed is not None:
+        state["pre_screening_status"] = "Fail"
+    state["knockout_reason"] = failed or ""
+    return state
+
+
+def knockout_filter(state: SharedState) -> SharedState:
+    """Local knockout rules (src/agent/knockouts.py) before any screening call"""
+    return apply_knockouts(state, cv_text_for(state), jd_profile_for(state))
+
+
+async def aknockout_filter(state: SharedState) -> SharedState:
+    """Async variant of `knockout_filter`"""
+    jd_profile = await ajd_profile_for(state)
+    return apply_knockouts(state, await acv_text_for(state), jd_profile)
+
+
+def knockout_router(state: SharedState) -> str:
+    """Certain knockouts skip screening (and the LLM rejection reason) and go straight to `reject`"""
+    return "reject" if state.get("knockout_reason") else "screen"
+
+
+def prescreening_analysis(state: SharedState) -> SharedState:
+    """Process user uploaded CV (PDF) and JD (text) for analysis"""
+    # Compiled once per JD and cached; the compact profile replaces the raw JD in the prompt
+    jd_profile = jd_profile_for(state)
+    
+    # Resolve the CV text extracted when the PDF was registered, compacted to the token budget
+    cv_text = compact_cv_text(state, cv_text_for(state))
+    
+    response = screening_invoke(prescreening_messages(cv_text, jd_profile), cascade.accept_prescreening)
+    return apply_prescreening_response(state, response)
+
+
+async def aprescreening_analysis(state: SharedState) -> SharedState:
+    """Async variant of `prescreening_analysis` for the LangGraph server"""
+    jd_profile = await ajd_profile_for(state)
+    cv_text = compact_cv_text(state, await acv_text_for(state))
+    
+    response = await ascreening_invoke(prescreening_messages(cv_text, jd_profile), cascade.accept_prescreening)
+    return apply_prescreening_response(state, response)
+
+
+def _check_fused_response(state: SharedState) -> SharedState:
+    analysis = state.get("skills_analysis")
+    if not isinstance(analysis, dict) or "score" not in analysis:
+        raise Exception("Missing required field in response: 'skills_analysis'")
+    return state
+
+
+def fused_screening(state: SharedState) -> SharedState:
+    """Prescreening and skills analysis in a single LLM call (SCREENING_MODE=fused)"""
+    jd_profile = jd_profile_for(state)
+    cv_text = compact_cv_text(state, cv_text_for(state))
+    
+    accept = cascade.accept_fused_screening(get_policy(state["jd_id"]))
+    response = screening_invoke(prescreening_messages(cv_text, jd_profile, fused_screening_system_msg), accept)
+    return _check_fused_response(apply_prescreening_response(state, response))
+
+
+async def afused_screening(state: SharedState) -> SharedState:
+    """Async variant of `fused_screening`"""
+    jd_profile = await ajd_profile_for(state)
+    cv_text = compact_cv_text(state, await acv_text_for(state))
+    
+    accept = cascade.accept_fused_screening(await asyncio.to_thread(get_policy, state["jd_id"]))
+    response = await ascreening_invoke(prescreening_messages(cv_text, jd_profile, fused_screening_system_msg), accept)
+    return _check_fused_response(apply_prescreening_response(state, response))
+
+
+def skills_analysis_messages(state: SharedState, jd_profile: JDProfile) -> list:
+    """Build the skills analysis prompt: system message, JD skill requirements (shared prefix), CV skills"""
     sys_message = SystemMessage(content=skills_analysis_system_msg)
+    jd_message = HumanMessage(content=render_jd_profile(jd_profile, "required_skills", "nice_to_have_skills"))
+    
     cv_skills = state["skills"]
     cv_message = HumanMessage(content=". Here are the skills: ".join(cv_skills) if isinstance(cv_skills, list) else str(cv_skills))
     
-    jd_text = state["jd_text"]
-    jd_message = HumanMessage(content=jd_text)
+    return [sys_message, jd_message, cv_message]
+
+
+def local_skills_analysis(state: SharedState, jd_profile: JDProfile) -> SharedState | None:
+    """Fast path: fill `skills_analysis` with the local matcher when it covers the JD well enough"""
+    cv_skills = state["skills"] if isinstance(state["skills"], list) else [state["skills"]]
+    analysis = match_skills(cv_skills, jd_profile)
+    if analysis is None:
+        return None
+    state["skills_analysis"] = analysis
+    return state
+
+
+def skills_analysis(state: SharedState) -> SharedState:
+    jd_profile = jd_profile_for(state)
+    local = local_skills_analysis(state, jd_profile)
+    if local is not None:
+        return local
     
-    messages = [sys_message, cv_message, jd_message]
+    accept = cascade.accept_skills_analysis(get_policy(state.get("jd_id")))
+    response = screening_invoke(skills_analysis_messages(state, jd_profile), accept)
+    data = json.loads(str(response.content))
+    state["skills_analysis"] = data["skills_analysis"]
+    return state
+
+
+async def askills_analysis(state: SharedState) -> SharedState:
+    """Async variant of `skills_analysis`"""
+    jd_profile = await ajd_profile_for(state)
+    local = local_skills_analysis(state, jd_profile)
+    if local is not None:
+        return local
     
-    response = LLM.invoke(messages)
+    accept = cascade.accept_skills_analysis(await asyncio.to_thread(get_policy, state.get("jd_id")))
+    response = await ascreening_invoke(skills_analysis_messages(state, jd_profile), accept)
     data = json.loads(str(response.content))
     state["skills_analysis"] = data["skills_analysis"]
     return state
@@ -90,18 +350,20 @@ def router1(state: SharedState) -> str:
 def router2(state: SharedState):
     """
     Route the state to the appropriate function based on the final decision.
+    Thresholds and knockouts come from the requisition's routing policy (src/agent/policy.py).
     """ 
-    score = state["skills_analysis"]["score"]
-    if score > 80:
-        return "Interview"
-    elif 50 <= score <= 80:
-        return "Phone Screen"
-    elif score < 50:
-        return "Rejected"
-    else:
-        raise ValueError(f"Invalid score: {score}")
+    return route(state, get_policy(state.get("jd_id")))
     
     
+def fused_router(state: SharedState) -> str:
+    """
+    Routing after `fused_screening`: `router1` first, then `router2` on the fused skills analysis.
+    """
+    if router1(state) == "reject":
+        return "Rejected"
+    return router2(state)
+
+
 def interview(state: SharedState) -> SharedState:
     state["final_decision"] = "Interview"
     return state
@@ -112,12 +374,39 @@ def phone_screen(state: SharedState) -> SharedState:
     return state
     
 
+def rejection_messages(state: SharedState) -> list:
+    return rejections.rejection_messages(state["skills_analysis"])
+
+
 def reject(state: SharedState) -> SharedState:
     state["final_decision"] = "Rejected"
-    sys_message = SystemMessage(content=rejected_system_msg)
-    messages = [sys_message, HumanMessage(content=json.dumps(state["skills_analysis"], indent=2))]
-    response = LLM.invoke(messages)
+    # Pre-screening failures have no skills analysis to explain: templated reason, no LLM call
+    template = rejections.fast_rejection_reason(state, jd_profile_for(state))
+    if template is not None:
+        state["rejection_reason"] = template
+        return state
+    response = get_llm().invoke(rejection_messages(state))
+    state["rejection_reason"] = str(response.content)
+    return state
+
+
+async def areject(state: SharedState) -> SharedState:
+    """Async variant of `reject`"""
+    state["final_decision"] = "Rejected"
+    template = rejections.fast_rejection_reason(state, await ajd_profile_for(state))
+    if template is not None:
+        state["rejection_reason"] = template
+        return state
+    response = await get_llm().ainvoke(rejection_messages(state))
     state["rejection_reason"] = str(response.content)
     return state
-    
 
+
+def defer_rejection(state: SharedState) -> SharedState:
+    """
+    `reject` for REJECTION_MODE=deferred: the reason is left empty for the batched
+    post-pass (see src/agent/rejections.py) unless the template applies.
+    """
+    state["final_decision"] = "Rejected"
+    state["rejection_reason"] = rejections.fast_rejection_reason(state, jd_profile_for(state)) or ""
+    return state
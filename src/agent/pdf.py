@@ -0,0 +1,110 @@
+"""
+CV PDF handling: text extraction from bytes, file-like objects or paths, and a
+content-addressed store of extracted text.
+
+Callers register a CV once with `register_cv` and pass the returned SHA-256 in
+the graph state (`cv_hash`); nodes resolve the text with `get_cv_text`.
+A resubmitted CV is never parsed twice. Clients of a deployed graph cannot reach
+this process's store, so they send a server-side `cv_file_path` or the `cv_text`
+instead, registered by the first node (see `nodes.cv_text_for`).
+"""
+import asyncio
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import BinaryIO, Union
+
+from src.agent.cache import TextCache
+from src.agent.metrics import timed
+
+
+PdfSource = Union[bytes, bytearray, BinaryIO, str, Path]
+
+CV_TEXT_CACHE = TextCache(os.getenv("CV_TEXT_CACHE_PATH", ".cache/cv_text.sqlite"), table="cv_text")
+
+
+def read_pdf_bytes(source: PdfSource) -> bytes:
+    """Return the raw bytes of a PDF given as bytes, a file-like object or a path"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def hash_pdf(data: bytes) -> str:
+    """SHA-256 of the file contents, used as the CV key everywhere in the pipeline"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_pdf_txt(source: PdfSource) -> str:
+    """Extract text from a PDF held in memory (or read from `source` if it is a path/file)"""
+    from pypdf import PdfReader
+
+    with timed("extract_pdf_txt"):
+        try:
+            reader = PdfReader(io.BytesIO(read_pdf_bytes(source)))
+            return "\n\n".join(page.extract_text() for page in reader.pages)
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+
+
+async def aextract_pdf_txt(source: PdfSource) -> str:
+    """Extract text from a PDF in a worker thread so the event loop is never blocked"""
+    return await asyncio.to_thread(extract_pdf_txt, source)
+
+
+def register_cv(source: PdfSource) -> str:
+    """
+    Make a CV available to the graph and return its content hash.
+    Text is only extracted when this exact file has not been seen before.
+    """
+    data = read_pdf_bytes(source)
+    cv_hash = hash_pdf(data)
+    if cv_hash not in CV_TEXT_CACHE:
+        CV_TEXT_CACHE.put(cv_hash, extract_pdf_txt(data))
+    return cv_hash
+
+
+async def aregister_cv(source: PdfSource) -> str:
+    """Async variant of `register_cv`; parsing runs in a worker thread"""
+    return await asyncio.to_thread(register_cv, source)
+
+
+def register_cv_text(cv_text: str) -> str:
+    """Register already extracted CV text; its key is the SHA-256 of the text"""
+    cv_hash = hashlib.sha256(cv_text.encode("utf-8")).hexdigest()
+    if cv_hash not in CV_TEXT_CACHE:
+        CV_TEXT_CACHE.put(cv_hash, cv_text)
+    return cv_hash
+
+
+async def aregister_cv_text(cv_text: str) -> str:
+    return await asyncio.to_thread(register_cv_text, cv_text)
+
+
+def has_cv_text(cv_hash: str) -> bool:
+    return cv_hash in CV_TEXT_CACHE
+
+
+async def ahas_cv_text(cv_hash: str) -> bool:
+    return await asyncio.to_thread(has_cv_text, cv_hash)
+
+
+def get_cv_text(cv_hash: str) -> str:
+    """Resolve the extracted text of a registered CV"""
+    cv_text = CV_TEXT_CACHE.get(cv_hash)
+    if cv_text is None:
+        raise Exception(
+            f"No extracted text for CV {cv_hash}; register the PDF with register_cv first, "
+            "or pass `cv_file_path` / `cv_text` in the graph input"
+        )
+    return cv_text
+
+
+async def aget_cv_text(cv_hash: str) -> str:
+    """Async variant of `get_cv_text` (the lookup may touch SQLite)"""
+    return await asyncio.to_thread(get_cv_text, cv_hash)
@@ -0,0 +1,199 @@
+"""
+Per-requisition routing policies and bulk re-routing.
+
+A `RoutingPolicy` holds the score thresholds of `router2` and knockout rules
+(minimum years of experience, must-have skills) for one requisition (JD id).
+Policies live in SQLite (`ROUTING_POLICY_PATH`) and are read on every routing
+decision, so a change applies to the next candidate without a restart.
+
+Policy knockouts are checked in `route`, after the skills analysis, so every
+stored result that passed pre-screening has what `route` needs: `reroute`
+re-applies the policy to the result store (src/agent/results.py) without running
+the graph. The local knockout rules that run before the LLM (src/agent/knockouts.py)
+only use the JD's own requirements, which a policy change does not touch, so the
+candidates they rejected stay rejected. Only records whose decision changes are
+rewritten, and only newly rejected candidates need an LLM call for their
+rejection reason (batched, see src/agent/rejections.py).
+
+Usage:
+    python -m src.agent.policy show --jd jd.txt
+    python -m src.agent.policy set --jd jd.txt --interview-above 85 --must-have python --reroute
+    python -m src.agent.policy reroute --jd jd.txt --dry-run
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from src.agent.cache import connect
+from src.agent.jd import get_jd_profile
+from src.agent.rejections import fast_rejection_reason, generate_rejection_reasons
+from src.agent.results import ResultStore, ScreeningResult
+from src.agent.skills import canonical_skill
+from src.agent.state import RoutingPolicy
+
+
+DEFAULT_POLICY = RoutingPolicy(
+    interview_above=80.0,
+    phone_screen_min=50.0,
+    min_years_experience=0.0,
+    must_have_skills=[],
+)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _db() -> sqlite3.Connection:
+    """Open the policy database on first use"""
+    global _conn
+    if _conn is None:
+        conn = connect(os.getenv("ROUTING_POLICY_PATH", ".cache/policies.sqlite"))
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS routing_policies (
+                requisition TEXT PRIMARY KEY,
+                policy TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def get_policy(requisition: Optional[str]) -> RoutingPolicy:
+    """Policy of a requisition, the defaults when none was set"""
+    if not requisition:
+        return DEFAULT_POLICY
+    with _lock:
+        row = _db().execute("SELECT policy FROM routing_policies WHERE requisition = ?", (requisition,)).fetchone()
+    return RoutingPolicy(**{**DEFAULT_POLICY, **json.loads(row[0])}) if row else DEFAULT_POLICY
+
+
+def set_policy(requisition: str, **changes: Any) -> RoutingPolicy:
+    """Update some fields of a requisition's policy and return the full policy"""
+    unknown = changes.keys() - DEFAULT_POLICY.keys()
+    if unknown:
+        raise Exception(f"Unknown routing policy fields: {', '.join(sorted(unknown))}")
+    policy = RoutingPolicy(**{**get_policy(requisition), **changes})
+    if not policy["phone_screen_min"] <= policy["interview_above"]:
+        raise Exception("phone_screen_min must not be above interview_above")
+    with _lock:
+        _db().execute(
+            "INSERT OR REPLACE INTO routing_policies VALUES (?, ?, ?)",
+            (requisition, json.dumps(policy), time.time()),
+        )
+        _db().commit()
+    return policy
+
+
+def knockout(state: dict, policy: RoutingPolicy) -> Optional[str]:
+    """The knockout rule a candidate fails, if any"""
+    if (state.get("years_of_experience") or 0) < policy["min_years_experience"]:
+        return f"less than {policy['min_years_experience']:g} years of experience"
+    matched = {canonical_skill(skill) for skill in (state.get("skills_analysis") or {}).get("matched", [])}
+    missing = [skill for skill in policy["must_have_skills"] if canonical_skill(skill) not in matched]
+    if missing:
+        return f"missing must-have skills: {', '.join(missing)}"
+    return None
+
+
+def route(state: dict, policy: RoutingPolicy = DEFAULT_POLICY) -> str:
+    """Final decision of a candidate that passed pre-screening: knockouts first, then the score thresholds"""
+    score = state["skills_analysis"]["score"]
+    if knockout(state, policy) is not None:
+        return "Rejected"
+    if score > policy["interview_above"]:
+        return "Interview"
+    elif policy["phone_screen_min"] <= score <= policy["interview_above"]:
+        return "Phone Screen"
+    elif score < policy["phone_screen_min"]:
+        return "Rejected"
+    else:
+        raise ValueError(f"Invalid score: {score}")
+
+
+def reroute(requisition: str, store: ResultStore, llm=None, policy: Optional[RoutingPolicy] = None,
+            dry_run: bool = False) -> dict:
+    """
+    Re-apply `policy` (default: the stored one) to every stored result of a requisition.
+    Changed records are written back; newly rejected candidates get a rejection reason
+    from `llm` (templated when they have no skills analysis, left empty without `llm`).
+    Returns the number of changed and newly rejected records and the decision transitions.
+    """
+    policy = policy or get_policy(requisition)
+    changed: list[dict] = []
+    transitions: dict[str, int] = {}
+    for record in store.records(requisition):
+        if record.get("status") != "ok" or record.get("pre_screening_status") != "Pass":
+            continue
+        decision = route(record, policy)
+        if decision == record.get("final_decision"):
+            continue
+        key = f"{record.get('final_decision')} -> {decision}"
+        transitions[key] = transitions.get(key, 0) + 1
+        record["final_decision"] = decision
+        record["rejection_reason"] = ""
+        changed.append(record)
+
+    rejected = {record["cv_hash"]: record for record in changed if record["final_decision"] == "Rejected"}
+    if not dry_run:
+        pending = {}
+        jd_profile = get_jd_profile(requisition) if rejected else None
+        for cv_hash, record in rejected.items():
+            template = fast_rejection_reason(record, jd_profile)
+            if template is not None:
+                record["rejection_reason"] = template
+            else:
+                pending[cv_hash] = record["skills_analysis"]
+        if pending and llm is not None:
+            for cv_hash, reason in generate_rejection_reasons(pending, llm).items():
+                rejected[cv_hash]["rejection_reason"] = reason
+        store.put_many(ScreeningResult(**record) for record in changed)
+    return {"changed": len(changed), "newly_rejected": len(rejected), "transitions": transitions}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from src.agent.jd import hash_jd
+    from src.agent.results import DEFAULT_RESULTS_PATH
+
+    parser = argparse.ArgumentParser(description="Show, change and re-apply the routing policy of a requisition.")
+    parser.add_argument("command", choices=["show", "set", "reroute"])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--jd", help="Path to the job description text file of the requisition")
+    target.add_argument("--requisition", help="Requisition (JD) id")
+    parser.add_argument("--db", default=os.getenv("RESULTS_DB_PATH") or DEFAULT_RESULTS_PATH, help="Results database")
+    parser.add_argument("--interview-above", type=float, default=None, help="Scores above this go to Interview")
+    parser.add_argument("--phone-screen-min", type=float, default=None, help="Scores from this up go to Phone Screen")
+    parser.add_argument("--min-years", type=float, default=None, help="Knock out candidates with less experience")
+    parser.add_argument("--must-have", nargs="*", default=None, help="Knock out candidates missing any of these skills")
+    parser.add_argument("--reroute", action="store_true", help="With `set`: re-apply the new policy to stored results")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+    args = parser.parse_args(argv)
+
+    requisition = args.requisition or hash_jd(Path(args.jd).read_text(encoding="utf-8"))
+    if args.command == "set":
+        changes = {
+            "interview_above": args.interview_above,
+            "phone_screen_min": args.phone_screen_min,
+            "min_years_experience": args.min_years,
+            "must_have_skills": args.must_have,
+        }
+        print(json.dumps(set_policy(requisition, **{k: v for k, v in changes.items() if v is not None}), indent=2))
+    elif args.command == "show":
+        print(json.dumps(get_policy(requisition), indent=2))
+    if args.command == "reroute" or args.reroute:
+        from src.agent import nodes
+
+        summary = reroute(requisition, ResultStore(args.db), None if args.dry_run else nodes.get_llm(), dry_run=args.dry_run)
+        print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
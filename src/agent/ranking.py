@@ -0,0 +1,108 @@
+"""
+Lexical pre-ranking of a candidate pool against a job description.
+
+`BM25Index` keeps a sparse inverted index (term -> postings of (doc, tf)) over
+extracted CV text, so ranking the whole pool against a JD only touches the
+postings of the JD's terms. `shortlist` returns the top-K (and/or those above a
+score cutoff); everything else can be deferred without any LLM call.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Optional
+
+from src.agent.state import JDProfile
+
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to we will with you your"
+    .split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens, keeping `c++`, `c#` and `node.js` intact"""
+    tokens = (t.rstrip(".") for t in TOKEN_RE.findall(text.lower()))
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents.
+    """
+
+    def __init__(self, docs: dict[str, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: list[str] = list(docs)
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.doc_len: list[int] = []
+        for i, doc_id in enumerate(self.doc_ids):
+            counts = Counter(tokenize(docs[doc_id]))
+            self.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        n = len(self.doc_ids)
+        self.avg_len = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+        # Per-document length normalization is query independent, so compute it once
+        self._norm = [
+            self.k1 * (1 - self.b + self.b * length / self.avg_len) if self.avg_len else self.k1
+            for length in self.doc_len
+        ]
+
+    def scores(self, query: dict[str, float]) -> list[float]:
+        """BM25 score of every document for a weighted bag of query terms"""
+        scores = [0.0] * len(self.doc_ids)
+        for term, weight in query.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term] * weight
+            for i, tf in postings:
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self._norm[i])
+        return scores
+
+    def rank(self, query: dict[str, float]) -> list[tuple[str, float]]:
+        """(doc_id, score) pairs, best first"""
+        scored = zip(self.doc_ids, self.scores(query))
+        return sorted(scored, key=lambda pair: pair[1], reverse=True)
+
+
+def jd_query(jd_text: str, jd_profile: Optional[JDProfile] = None, skill_weight: float = 2.0) -> dict[str, float]:
+    """
+    Weighted query terms for a JD: raw JD terms once each, required skills from
+    the compiled profile boosted by `skill_weight`.
+    """
+    query: dict[str, float] = {term: 1.0 for term in tokenize(jd_text)}
+    if jd_profile:
+        for skill in jd_profile["required_skills"]:
+            for term in tokenize(skill):
+                query[term] = max(query.get(term, 0.0), skill_weight)
+    return query
+
+
+def shortlist(
+    docs: dict[str, str],
+    jd_text: str,
+    jd_profile: Optional[JDProfile] = None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> tuple[list[tuple[str, float]], list[tuple[str, float]]]:
+    """
+    Rank `docs` (id -> CV text) against the JD in one pass.
+    Returns (shortlisted, deferred), each a best-first list of (doc_id, score).
+    """
+    ranked = BM25Index(docs).rank(jd_query(jd_text, jd_profile))
+    keep: list[tuple[str, float]] = []
+    deferred: list[tuple[str, float]] = []
+    for doc_id, score in ranked:
+        within_k = top_k is None or len(keep) < top_k
+        above_cutoff = min_score is None or score >= min_score
+        (keep if within_k and above_cutoff else deferred).append((doc_id, score))
+    return keep, deferred
+
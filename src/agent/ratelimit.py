@@ -0,0 +1,347 @@
+"""
+Shared request scheduler for the Groq client.
+
+Every LLM call that misses the response cache passes through one `RequestScheduler`
+(plugged into the chat model as its `rate_limiter`, so cache hits cost nothing):
+- two token buckets hold the requests-per-minute and tokens-per-minute quotas; tokens are
+  estimated from the prompt size and corrected with the reported usage afterwards
+- the number of calls in flight adapts with AIMD: it grows by one per window of successes
+  and is halved on every 429
+- waiters are served by priority, so interactive (Streamlit) calls overtake batch jobs
+
+`ScheduledLLM` wraps the chat model: it tells the scheduler how large each call is and
+how it ended, and retries 429/5xx responses, waiting for `retry-after` when the API sends it.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from src.agent.compaction import estimate_tokens
+from src.agent import metrics
+
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Longest a waiter sleeps before re-checking its turn
+POLL_SECONDS = 0.05
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+_current_call: contextvars.ContextVar[Optional["_Call"]] = contextvars.ContextVar("llm_call", default=None)
+
+
+@contextmanager
+def priority(level: int):
+    """Run the LLM calls made inside the block (and in the graph runs it starts) at `level`"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute, holding at most one minute's worth.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (requests larger than the bucket wait for a full one)"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate, 0.0)
+
+    def take(self, amount: float) -> None:
+        # May overdraw: the next callers then wait for the refill
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Call:
+    """One logical LLM call as seen by the scheduler"""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.acquired = False
+
+
+class RequestScheduler(BaseRateLimiter):
+    """
+    Priority-ordered admission of LLM requests under RPM/TPM quotas and an AIMD concurrency limit.
+    A quota of 0 disables that bucket.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 8000,
+        max_concurrency: int = 16,
+        initial_concurrency: int = 4,
+        output_tokens: int = 400,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.output_tokens = output_tokens
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        """
+        Configure from GROQ_REQUESTS_PER_MINUTE / GROQ_TOKENS_PER_MINUTE (defaults: the free-tier
+        quotas of openai/gpt-oss-120b), LLM_MAX_CONCURRENCY and LLM_INITIAL_CONCURRENCY.
+        """
+        return cls(
+            requests_per_minute=float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30")),
+            tokens_per_minute=float(os.getenv("GROQ_TOKENS_PER_MINUTE", "8000")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            initial_concurrency=int(os.getenv("LLM_INITIAL_CONCURRENCY", "4")),
+        )
+
+    def estimate(self, messages: Any) -> int:
+        """Estimated tokens of one call: prompt size plus a fixed allowance for the answer"""
+        if isinstance(messages, list):
+            text = "".join(str(getattr(m, "content", m)) for m in messages)
+        else:
+            text = str(messages)
+        return estimate_tokens(text) + self.output_tokens
+
+    def _try_admit(self, ticket: tuple[int, int], call: Optional[_Call]) -> float:
+        """Admit `ticket` if it is first in line and within every limit; else seconds to wait (0 = admitted)"""
+        if self._waiters[0] != ticket:
+            return POLL_SECONDS
+        # Calls made outside `ScheduledLLM` never report back, so they only draw on the quotas
+        if call is not None and self.in_flight >= int(self.limit):
+            return POLL_SECONDS
+        now = time.monotonic()
+        tokens = call.tokens if call is not None else self.output_tokens
+        wait = max(
+            self.paused_until - now,
+            self.requests.wait_time(1, now) if self.requests else 0.0,
+            self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+        )
+        if wait > 0:
+            return wait
+        heapq.heappop(self._waiters)
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        if call is not None:
+            call.acquired = True
+            self.in_flight += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _enqueue(self) -> tuple[int, int]:
+        ticket = (_priority.get(), next(self._seq))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: tuple[int, int]) -> None:
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        call = _current_call.get()
+        with self._cond:
+            ticket = self._enqueue()
+            try:
+                while (wait := self._try_admit(ticket, call)) > 0:
+                    if not blocking:
+                        self._dequeue(ticket)
+                        return False
+                    self._cond.wait(min(wait, POLL_SECONDS))
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        call = _current_call.get()
+        with self._cond:
+            ticket = self._enqueue()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket, call)
+                    if wait > 0 and not blocking:
+                        self._dequeue(ticket)
+                        return False
+                if wait == 0:
+                    return True
+                await asyncio.sleep(min(wait, POLL_SECONDS))
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+
+    def release(self, call: _Call, used_tokens: Optional[int] = None, rate_limited: bool = False,
+                retry_after: Optional[float] = None, settled: bool = True, retrying: bool = False) -> None:
+        """
+        Report how an admitted call ended: frees its slot, corrects the token estimate and
+        adapts the limit (`settled=False` only frees the slot, e.g. after a cancellation).
+        """
+        with self._cond:
+            self.retries += retrying
+            if not call.acquired:
+                return
+            call.acquired = False
+            self.in_flight -= 1
+            if not settled:
+                self._cond.notify_all()
+                return
+            if self.tokens and used_tokens is not None:
+                if used_tokens < call.tokens:
+                    self.tokens.give(call.tokens - used_tokens)
+                else:
+                    self.tokens.take(used_tokens - call.tokens)
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(1.0, self.limit / 2)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "concurrency_limit": int(self.limit),
+                "waiting": len(self._waiters),
+                "rate_limited": self.rate_limited,
+                "retries": self.retries,
+            }
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from the `retry-after` / `retry-after-ms` headers of an API error, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if _status_code(error) in RETRYABLE_STATUS:
+        return True
+    try:
+        from groq import APIConnectionError
+    except ImportError:
+        return False
+    return isinstance(error, APIConnectionError)
+
+
+class ScheduledLLM:
+    """
+    Chat model proxy whose `invoke` / `ainvoke` report to `scheduler` and retry
+    rate-limit and server errors with exponential backoff (or the server's `retry-after`).
+    Every other attribute is the wrapped model's.
+    """
+
+    def __init__(self, llm, scheduler: RequestScheduler, max_retries: int = 6,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.llm = llm
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def _settle(self, call: _Call, response: Any = None, error: Optional[BaseException] = None,
+                attempt: int = 0) -> Optional[float]:
+        """Report the outcome; for a retryable error return the delay before the next attempt"""
+        if error is None:
+            usage = getattr(response, "usage_metadata", None) or {}
+            self.scheduler.release(call, used_tokens=usage.get("total_tokens"))
+            return None
+        delay = retry_after(error)
+        retrying = attempt < self.max_retries and is_retryable(error)
+        self.scheduler.release(call, rate_limited=_status_code(error) == 429, retry_after=delay, retrying=retrying)
+        if not retrying:
+            return None
+        metrics.record(llm_retries=1)
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+        return delay if delay is not None else backoff
+
+    def invoke(self, messages, config=None, **kwargs):
+        for attempt in itertools.count():
+            call = _Call(self.scheduler.estimate(messages))
+            token = _current_call.set(call)
+            try:
+                response = self.llm.invoke(messages, config, **kwargs)
+            except Exception as e:
+                delay = self._settle(call, error=e, attempt=attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.scheduler.release(call, settled=False)
+                raise
+            finally:
+                _current_call.reset(token)
+            self._settle(call, response)
+            return response
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        for attempt in itertools.count():
+            call = _Call(self.scheduler.estimate(messages))
+            token = _current_call.set(call)
+            try:
+                response = await self.llm.ainvoke(messages, config, **kwargs)
+            except Exception as e:
+                delay = self._settle(call, error=e, attempt=attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled mid-call: free the slot without touching the concurrency limit
+                self.scheduler.release(call, settled=False)
+                raise
+            finally:
+                _current_call.reset(token)
+            self._settle(call, response)
+            return response
@@ -0,0 +1,118 @@
+"""
+Rejection reasons without one LLM round trip per rejected candidate.
+
+- `template_rejection_reason`: candidates that failed pre-screening never got a
+  skills analysis, so there is nothing for the LLM to explain; they get a
+  templated reason, naming the requirement they failed only when the local
+  knockout rules (src/agent/knockouts.py) established it.
+- `generate_rejection_reasons`: the deferred post-pass used by bulk screening.
+  Rejected candidates are collected after the graph runs and sent in chunks of
+  `REJECTION_BATCH_SIZE` to a single structured call; candidates with identical
+  skills analyses share one reason. Anything the batched answer misses falls
+  back to the per-candidate prompt.
+"""
+import asyncio
+import json
+import os
+from typing import Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.agent.prompts import batched_rejection_system_msg, rejected_system_msg
+from src.agent.state import JDProfile, SharedState, SkillAnalysis
+
+
+REJECTION_BATCH_SIZE = int(os.getenv("REJECTION_BATCH_SIZE", "20"))
+
+
+def has_skills_analysis(skills_analysis: Optional[SkillAnalysis]) -> bool:
+    """False for the empty analysis a candidate rejected at pre-screening still carries"""
+    return bool(skills_analysis and (skills_analysis.get("matched") or skills_analysis.get("missing")))
+
+
+def template_rejection_reason(jd_profile: Optional[JDProfile], knockout_reason: Optional[str] = None) -> str:
+    """
+    Polite rejection for a pre-screening failure. Only a requirement known to have failed
+    (`knockout_reason`) is named: the JD's other requirements may well be met.
+    """
+    title = (jd_profile or {}).get("title") or "this"
+    reason = f"Thank you for your interest in the {title} position. After reviewing your CV, we found that it does not meet the minimum requirements for the role"
+    if knockout_reason:
+        reason += f" ({knockout_reason})"
+    return reason + ", so we will not be moving forward with your application at this time."
+
+
+def fast_rejection_reason(state: SharedState, jd_profile: Optional[JDProfile]) -> Optional[str]:
+    """Templated reason when the state has no skills analysis to explain, else None"""
+    if has_skills_analysis(state.get("skills_analysis")):
+        return None
+    return template_rejection_reason(jd_profile, state.get("knockout_reason"))
+
+
+def rejection_messages(skills_analysis: SkillAnalysis) -> list:
+    """Per-candidate prompt: system message and the skills analysis"""
+    sys_message = SystemMessage(content=rejected_system_msg)
+    return [sys_message, HumanMessage(content=json.dumps(skills_analysis, indent=2))]
+
+
+def batched_rejection_messages(analyses: dict[str, SkillAnalysis]) -> list:
+    """One prompt for many candidates, keyed by id"""
+    applicants = [{"id": key, "skills_analysis": analysis} for key, analysis in analyses.items()]
+    return [SystemMessage(content=batched_rejection_system_msg), HumanMessage(content=json.dumps(applicants))]
+
+
+def _parse_reasons(content: str) -> dict[str, str]:
+    try:
+        data = json.loads(content)
+        return {str(item["id"]): str(item["reason"]) for item in data["reasons"] if item.get("reason")}
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return {}
+
+
+def _chunks(analyses: dict[str, SkillAnalysis], size: int) -> list[dict[str, SkillAnalysis]]:
+    keys = list(analyses)
+    return [{key: analyses[key] for key in keys[i:i + size]} for i in range(0, len(keys), size)]
+
+
+def _dedupe(analyses: dict[str, SkillAnalysis]) -> tuple[dict[str, SkillAnalysis], dict[str, str]]:
+    """Unique analyses keyed by their first id, plus id -> that first id"""
+    unique: dict[str, SkillAnalysis] = {}
+    first_by_content: dict[str, str] = {}
+    alias: dict[str, str] = {}
+    for key, analysis in analyses.items():
+        content = json.dumps(analysis, sort_keys=True)
+        first = first_by_content.setdefault(content, key)
+        if first == key:
+            unique[key] = analysis
+        alias[key] = first
+    return unique, alias
+
+
+def generate_rejection_reasons(analyses: dict[str, SkillAnalysis], llm, batch_size: int = REJECTION_BATCH_SIZE) -> dict[str, str]:
+    """Rejection reason per id, with one LLM call per `batch_size` distinct analyses"""
+    unique, alias = _dedupe(analyses)
+    reasons: dict[str, str] = {}
+    for chunk in _chunks(unique, batch_size):
+        parsed = _parse_reasons(str(llm.invoke(batched_rejection_messages(chunk)).content))
+        reasons.update({key: reason for key, reason in parsed.items() if key in chunk})
+        for key in chunk.keys() - reasons.keys():
+            reasons[key] = str(llm.invoke(rejection_messages(chunk[key])).content)
+    return {key: reasons[first] for key, first in alias.items()}
+
+
+async def agenerate_rejection_reasons(analyses: dict[str, SkillAnalysis], llm, batch_size: int = REJECTION_BATCH_SIZE) -> dict[str, str]:
+    """Async variant of `generate_rejection_reasons`; chunks are requested concurrently"""
+    unique, alias = _dedupe(analyses)
+
+    async def run_chunk(chunk: dict[str, SkillAnalysis]) -> dict[str, str]:
+        response = await llm.ainvoke(batched_rejection_messages(chunk))
+        reasons = {key: reason for key, reason in _parse_reasons(str(response.content)).items() if key in chunk}
+        missing = [key for key in chunk if key not in reasons]
+        fallbacks = await asyncio.gather(*(llm.ainvoke(rejection_messages(chunk[key])) for key in missing))
+        reasons.update({key: str(response.content) for key, response in zip(missing, fallbacks)})
+        return reasons
+
+    reasons: dict[str, str] = {}
+    for chunk_reasons in await asyncio.gather(*(run_chunk(chunk) for chunk in _chunks(unique, batch_size))):
+        reasons.update(chunk_reasons)
+    return {key: reasons[first] for key, first in alias.items()}
@@ -0,0 +1,235 @@
+"""
+Compact screening results and a queryable result store.
+
+`ScreeningResult` is the per-candidate record of a batch: a `__slots__` object
+holding only the screening outcome (the JD lives once in the registry of
+src/agent/jd.py and is referenced by `requisition`, its JD id).
+
+`ResultStore` keeps results in SQLite, one row per (requisition, CV), with the
+columns recruiters filter on next to the full JSON record. The indexes on
+(requisition, final_decision, score) make "top 50 by score" an index scan.
+
+Usage:
+    python -m src.agent.results top --jd jd.txt -n 50 --decision Interview
+    python -m src.agent.results counts --jd jd.txt
+    python -m src.agent.results export --jd jd.txt --out results.parquet
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from src.agent.cache import connect
+from src.agent.state import SharedState
+
+
+DEFAULT_RESULTS_PATH = ".cache/results.sqlite"
+
+# Graph state fields kept in a result, in output order
+STATE_FIELDS = (
+    "name", "email", "phone", "years_of_experience", "skills", "pre_screening_status",
+    "skills_analysis", "final_decision", "rejection_reason", "cv_compaction", "knockout_reason",
+)
+
+
+class ScreeningResult:
+    """Outcome of one candidate; unset fields are None and left out of `to_dict`"""
+
+    __slots__ = ("file", "status", "error", "cv_hash", "requisition") + STATE_FIELDS + (
+        "rank_score", "thread_id", "from_checkpoint", "duplicate_of", "similarity", "seen_in",
+    )
+
+    def __init__(self, file: str, status: str = "ok", **fields: Any):
+        self.file = file
+        self.status = status
+        for name in self.__slots__[2:]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown result fields: {', '.join(fields)}")
+
+    @classmethod
+    def from_state(cls, file: str, state: SharedState, requisition: Optional[str] = None, status: str = "ok") -> "ScreeningResult":
+        """Keep the screening fields of a final graph state (the JD and any extra keys are dropped)"""
+        fields = {name: state[name] for name in STATE_FIELDS if name in state}
+        if not fields.get("knockout_reason"):
+            # Set only for candidates the local knockout rules rejected
+            fields.pop("knockout_reason", None)
+        return cls(file, status, cv_hash=state.get("cv_hash"), requisition=requisition or state.get("jd_id"), **fields)
+
+    @classmethod
+    def from_error(cls, file: str, error: BaseException, requisition: Optional[str] = None) -> "ScreeningResult":
+        return cls(file, "error", error=f"{type(error).__name__}: {error}", requisition=requisition)
+
+    @property
+    def score(self) -> Optional[float]:
+        return (self.skills_analysis or {}).get("score")
+
+    def to_dict(self) -> dict:
+        """JSON record, one line of the batch output"""
+        return {name: value for name in self.__slots__ if (value := getattr(self, name)) is not None}
+
+
+class ResultStore:
+    """
+    SQLite store of screening results keyed by (requisition, cv_hash); re-screening a
+    CV for the same requisition replaces its row.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                requisition TEXT NOT NULL,
+                cv_hash TEXT NOT NULL,
+                file TEXT NOT NULL,
+                status TEXT NOT NULL,
+                final_decision TEXT,
+                score REAL,
+                name TEXT,
+                email TEXT,
+                record TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (requisition, cv_hash)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_decision_score ON results (requisition, final_decision, score DESC)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_score ON results (requisition, score DESC)")
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """Store at `RESULTS_DB_PATH`; None when it is set to an empty string"""
+        path = os.getenv("RESULTS_DB_PATH", DEFAULT_RESULTS_PATH)
+        return cls(path) if path else None
+
+    def put_many(self, results: Iterable[ScreeningResult]) -> int:
+        """
+        Insert or update results; those without a CV hash or requisition (unreadable PDFs) are skipped.
+        A stored "ok" result is only replaced by another "ok" one, never by a deferred or failed rerun.
+        """
+        now = time.time()
+        rows = [
+            (r.requisition, r.cv_hash, r.file, r.status, r.final_decision, r.score, r.name, r.email,
+             json.dumps(r.to_dict(), ensure_ascii=False), now)
+            for r in results
+            if r.cv_hash and r.requisition
+        ]
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (requisition, cv_hash) DO UPDATE SET
+                    file = excluded.file, status = excluded.status, final_decision = excluded.final_decision,
+                    score = excluded.score, name = excluded.name, email = excluded.email,
+                    record = excluded.record, updated_at = excluded.updated_at
+                WHERE results.status != 'ok' OR excluded.status = 'ok'""",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def top(self, requisition: str, n: int = 50, decision: Optional[str] = None) -> list[dict]:
+        """The `n` best-scored results of a requisition, optionally of one final decision"""
+        query = "SELECT record FROM results WHERE requisition = ?"
+        params: list[Any] = [requisition]
+        if decision is not None:
+            query += " AND final_decision = ?"
+            params.append(decision)
+        query += " ORDER BY score DESC LIMIT ?"
+        params.append(n)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def records(self, requisition: str) -> Iterator[dict]:
+        """Every stored record of a requisition"""
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM results WHERE requisition = ?", (requisition,)).fetchall()
+        return (json.loads(record) for (record,) in rows)
+
+    def get(self, requisition: str, cv_hash: str) -> Optional[dict]:
+        """Stored record of one CV for a requisition"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM results WHERE requisition = ? AND cv_hash = ?", (requisition, cv_hash)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def requisitions(self, cv_hashes: Iterable[str]) -> set[str]:
+        """Requisitions that have a result for any of the CVs"""
+        cv_hashes = list(cv_hashes)
+        if not cv_hashes:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT requisition FROM results WHERE cv_hash IN ({', '.join('?' * len(cv_hashes))})", cv_hashes
+            ).fetchall()
+        return {requisition for (requisition,) in rows}
+
+    def counts(self, requisition: str) -> dict[str, int]:
+        """Number of results per final decision (or status, for errors and deferred candidates)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT COALESCE(final_decision, status), COUNT(*) FROM results WHERE requisition = ? GROUP BY 1",
+                (requisition,),
+            ).fetchall()
+        return dict(rows)
+
+    def export_parquet(self, out_path: str, requisition: Optional[str] = None) -> int:
+        """Write the indexed columns plus the JSON record to a Parquet file (requires pyarrow)"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Parquet export requires pyarrow: pip install pyarrow")
+        query = "SELECT requisition, cv_hash, file, status, final_decision, score, name, email, record FROM results"
+        params: tuple = ()
+        if requisition is not None:
+            query += " WHERE requisition = ?"
+            params = (requisition,)
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        table = pa.table({column: [row[i] for row in rows] for i, column in enumerate(columns)})
+        pq.write_table(table, out_path)
+        return len(rows)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from src.agent.jd import hash_jd
+
+    parser = argparse.ArgumentParser(description="Query stored screening results.")
+    parser.add_argument("command", choices=["top", "counts", "export"])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--jd", help="Path to the job description text file of the requisition")
+    target.add_argument("--requisition", help="Requisition (JD) id")
+    parser.add_argument("--db", default=os.getenv("RESULTS_DB_PATH") or DEFAULT_RESULTS_PATH, help="Results database")
+    parser.add_argument("-n", type=int, default=50, help="Number of results for `top`")
+    parser.add_argument("--decision", choices=["Interview", "Phone Screen", "Rejected"], default=None)
+    parser.add_argument("--out", default="results.parquet", help="Parquet file for `export`")
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"No results database at {args.db}", file=sys.stderr)
+        return 1
+    requisition = args.requisition or hash_jd(Path(args.jd).read_text(encoding="utf-8"))
+    store = ResultStore(args.db)
+    if args.command == "top":
+        for record in store.top(requisition, args.n, args.decision):
+            print(json.dumps(record, ensure_ascii=False))
+    elif args.command == "counts":
+        print(json.dumps(store.counts(requisition), indent=2))
+    else:
+        exported = store.export_parquet(args.out, requisition)
+        print(f"Exported {exported} results -> {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
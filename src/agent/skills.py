@@ -0,0 +1,283 @@
+"""
+Local, deterministic skill matching used as a fast path for `skills_analysis`.
+
+Skills are normalized and resolved through a synonym/alias index
+("torch" -> "pytorch", "k8s" -> "kubernetes"), with version suffixes dropped
+("python 3.11" -> "python"). A skill also covers its parents ("eks" ->
+"kubernetes", "postgresql" -> "sql") and a cloud or platform product covers its
+vendor ("aws glue" -> "amazon web services"). A `SkillMatcher` compiled per JD
+profile maps every required skill to one bit, so scoring a candidate is an AND
+plus a popcount over Python integers. Only required skills known to the index
+count as decided, and a missing one is not decided while some CV skill cannot
+be resolved (it may be an equivalent); when too few are decided the caller
+falls back to the LLM.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from src.agent.state import JDProfile, SkillAnalysis
+
+
+# canonical name -> aliases (all lowercase)
+SKILL_ALIASES: dict[str, list[str]] = {
+    "python": ["python3", "py"],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "java": [],
+    "html": ["html5"],
+    "css": ["css3"],
+    "c++": ["cpp", "c plus plus"],
+    "c#": ["csharp", "c sharp"],
+    "go": ["golang"],
+    "node.js": ["nodejs", "node"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "sql": ["structured query language"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "sqlite": ["sqlite3"],
+    "sql server": ["mssql", "microsoft sql server", "t-sql", "tsql"],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "pytorch": ["torch"],
+    "tensorflow": ["tf", "tensorflow 2", "tensor flow"],
+    "keras": [],
+    "scikit-learn": ["sklearn", "scikit learn", "scikit"],
+    "pandas": [],
+    "numpy": [],
+    "matplotlib": [],
+    "hugging face": ["huggingface", "hf", "hugging face transformers"],
+    "langchain": [],
+    "langgraph": [],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": ["image processing"],
+    "large language models": ["llm", "llms", "large language model"],
+    "generative ai": ["genai", "gen ai"],
+    "retrieval augmented generation": ["rag"],
+    "prompt engineering": [],
+    "neural networks": ["neural network", "nn", "ann"],
+    "convolutional neural networks": ["cnn", "cnns"],
+    "recurrent neural networks": ["rnn", "rnns", "lstm"],
+    "reinforcement learning": ["rl"],
+    "mlops": ["ml ops"],
+    "data analysis": ["data analytics"],
+    "data visualization": ["dataviz"],
+    "statistics": ["statistical analysis"],
+    "docker": [],
+    "docker compose": ["docker-compose"],
+    "kubernetes": ["k8s"],
+    "amazon eks": ["eks", "aws eks", "elastic kubernetes service"],
+    "google kubernetes engine": ["gke"],
+    "azure kubernetes service": ["aks"],
+    "aws lambda": ["amazon lambda"],
+    "amazon s3": ["s3", "aws s3"],
+    "amazon ec2": ["ec2", "aws ec2"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery"],
+    "git": ["github", "gitlab", "version control"],
+    "linux": ["unix", "bash", "shell scripting"],
+    "rest api": ["rest", "restful api", "restful apis", "rest apis"],
+    "fastapi": ["fast api"],
+    "flask": [],
+    "django": [],
+    "spark": ["apache spark", "pyspark"],
+    "airflow": ["apache airflow"],
+    "object-oriented programming": ["oop", "object oriented programming"],
+    "data structures and algorithms": ["dsa", "data structures", "algorithms"],
+    "agile": ["scrum", "kanban"],
+    "english": ["ielts", "toefl"],
+}
+
+
+# canonical name -> broader skills it demonstrates
+SKILL_PARENTS: dict[str, list[str]] = {
+    "postgresql": ["sql"],
+    "mysql": ["sql"],
+    "sqlite": ["sql"],
+    "sql server": ["sql"],
+    "docker compose": ["docker"],
+    "amazon eks": ["kubernetes", "amazon web services"],
+    "google kubernetes engine": ["kubernetes", "google cloud platform"],
+    "azure kubernetes service": ["kubernetes", "microsoft azure"],
+    "aws lambda": ["amazon web services"],
+    "amazon s3": ["amazon web services"],
+    "amazon ec2": ["amazon web services"],
+}
+
+# Leading words naming a product family: "aws glue", "azure functions", "docker swarm"
+PRODUCT_PREFIXES: dict[str, str] = {
+    "aws": "amazon web services",
+    "amazon": "amazon web services",
+    "azure": "microsoft azure",
+    "microsoft azure": "microsoft azure",
+    "gcp": "google cloud platform",
+    "google cloud": "google cloud platform",
+    "docker": "docker",
+    "kubernetes": "kubernetes",
+    "apache spark": "spark",
+}
+
+# "python 3.11", "java 17", "react v18", "html5", "angular 2+", "vue 3.x"
+VERSION_SUFFIX_RE = re.compile(r"(?:\s+v?|(?<=[a-z]))\d+(?:\.\d+)*(?:\.x|\+)?$")
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase, trim punctuation and collapse whitespace"""
+    skill = skill.strip().lower()
+    skill = re.sub(r"[\s_]+", " ", skill)
+    return skill.strip(" .,;:()[]")
+
+
+def _build_alias_index(aliases: dict[str, list[str]]) -> dict[str, str]:
+    index: dict[str, str] = {}
+    for canonical, names in aliases.items():
+        index[normalize_skill(canonical)] = canonical
+        for name in names:
+            index[normalize_skill(name)] = canonical
+    return index
+
+
+ALIAS_INDEX = _build_alias_index(SKILL_ALIASES)
+
+
+@lru_cache(maxsize=4096)
+def _resolve(normalized: str) -> tuple[str, tuple[str, ...], bool]:
+    """(canonical name, skills it covers including itself, known to the index?) of a normalized skill"""
+    canonical = ALIAS_INDEX.get(normalized)
+    unversioned = VERSION_SUFFIX_RE.sub("", normalized)
+    if canonical is None:
+        canonical = ALIAS_INDEX.get(unversioned)
+    if unversioned != normalized and normalized[len(unversioned)].isspace():
+        # "terraform 1.5" -> "terraform"; "web3" stays as is
+        normalized = unversioned
+    family = None
+    if canonical is None:
+        words = normalized.split()
+        family = next(
+            (PRODUCT_PREFIXES[prefix] for prefix in (" ".join(words[:n]) for n in range(len(words) - 1, 0, -1))
+             if prefix in PRODUCT_PREFIXES),
+            None,
+        )
+    covered = [canonical or normalized]
+    pending = [family] if family else list(SKILL_PARENTS.get(canonical or "", []))
+    while pending:
+        skill = pending.pop()
+        if skill not in covered:
+            covered.append(skill)
+            pending.extend(SKILL_PARENTS.get(skill, []))
+    return canonical or normalized, tuple(covered), canonical is not None or family is not None
+
+
+def canonical_skill(skill: str) -> str:
+    """Resolve a skill through the alias index (unknown skills stay normalized)"""
+    return _resolve(normalize_skill(skill))[0]
+
+
+def covered_skills(skill: str) -> tuple[str, ...]:
+    """Canonical skill plus the broader skills it covers ("eks" -> amazon eks, kubernetes, amazon web services)"""
+    return _resolve(normalize_skill(skill))[1]
+
+
+def is_known_skill(skill: str) -> bool:
+    """Whether the index resolves the skill (directly, without its version, or as a product of a known family)"""
+    return _resolve(normalize_skill(skill))[2]
+
+
+class SkillMatcher:
+    """
+    Required skills of one JD profile compiled into bit positions.
+    """
+
+    def __init__(self, required_skills: Iterable[str]):
+        self.required: list[str] = []
+        self.bits: dict[str, int] = {}
+        self.known_mask = 0
+        for skill in required_skills:
+            canonical = canonical_skill(skill)
+            if canonical in self.bits:
+                continue
+            bit = 1 << len(self.required)
+            self.bits[canonical] = bit
+            self.required.append(canonical)
+            if is_known_skill(skill):
+                self.known_mask |= bit
+        self.full_mask = (1 << len(self.required)) - 1
+
+    def mask(self, skills: Iterable[str]) -> int:
+        """Bitset of the required skills present in (or covered by) `skills`"""
+        mask = 0
+        for skill in skills:
+            for covered in covered_skills(skill):
+                mask |= self.bits.get(covered, 0)
+        return mask
+
+    def score(self, mask: int) -> float:
+        if not self.required:
+            return 0.0
+        return float(round(mask.bit_count() * 100 / len(self.required)))
+
+    def coverage(self, mask: int, unresolved: bool = False) -> float:
+        """
+        Share of required skills the matcher can judge. Only skills known to the index count:
+        a literal match of an unknown skill is not enough on its own. With `unresolved` CV
+        skills, a missing skill may hide behind one of them, so only matched ones count.
+        """
+        if not self.required:
+            return 0.0
+        decided = mask if unresolved else self.full_mask
+        return (self.known_mask & decided).bit_count() / len(self.required)
+
+    def score_many(self, candidates: Iterable[Iterable[str]]) -> list[float]:
+        """Score many candidates' skill lists against this JD in one pass"""
+        return [self.score(self.mask(skills)) for skills in candidates]
+
+    def analyze(self, cv_skills: Iterable[str]) -> tuple[SkillAnalysis, float]:
+        """`SkillAnalysis` for one candidate plus the coverage it was computed with"""
+        cv_skills = [skill for skill in cv_skills if skill.strip()]
+        canonical_cv = list(dict.fromkeys(canonical_skill(skill) for skill in cv_skills))
+        mask = self.mask(cv_skills)
+        matched = [skill for skill in self.required if mask & self.bits[skill]]
+        missing = [skill for skill in self.required if not mask & self.bits[skill]]
+        additional = [skill for skill in canonical_cv if skill not in self.bits]
+        analysis = SkillAnalysis(matched=matched, missing=missing, additional=additional, score=self.score(mask))
+        return analysis, self.coverage(mask, unresolved=not all(is_known_skill(skill) for skill in cv_skills))
+
+
+MIN_COVERAGE = float(os.getenv("SKILL_MATCH_MIN_COVERAGE", "0.8"))
+
+_matchers: dict[str, SkillMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def matcher_for(jd_profile: JDProfile) -> SkillMatcher:
+    """Compiled matcher for a JD profile, built once per JD hash"""
+    key = f"{jd_profile['version']}:{jd_profile['jd_hash']}"
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = _matchers[key] = SkillMatcher(jd_profile["required_skills"])
+        return matcher
+
+
+def match_skills(cv_skills: Iterable[str], jd_profile: JDProfile, min_coverage: float = MIN_COVERAGE) -> Optional[SkillAnalysis]:
+    """
+    Local skills analysis, or None when the matcher cannot vouch for the result
+    (no required skills, or coverage below `min_coverage`, which unresolved CV skills
+    lower) and the LLM should decide.
+    """
+    matcher = matcher_for(jd_profile)
+    if not matcher.required:
+        return None
+    analysis, coverage = matcher.analyze(cv_skills)
+    if coverage < min_coverage:
+        return None
+    return analysis
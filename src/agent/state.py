@@ -11,6 +11,41 @@ class SkillAnalysis(TypedDict):
     score: float
     
 
+class JDProfile(TypedDict):
+    """
+    Compact requirements profile compiled once per job description.
+    """
+    version: int
+    jd_hash: str
+    title: str
+    knockout_criteria: list[str]
+    min_years_experience: float
+    required_skills: list[str]
+    nice_to_have_skills: list[str]
+
+
+class RoutingPolicy(TypedDict):
+    """
+    Per-requisition routing: score thresholds of `router2` and knockout rules
+    applied on top of the skills analysis.
+    """
+    interview_above: float
+    phone_screen_min: float
+    min_years_experience: float
+    must_have_skills: list[str]
+
+
+class CompactionStats(TypedDict):
+    """
+    Token accounting for one compacted CV (tokens are estimated as characters / 4).
+    `dropped_sections` lists sections left out or truncated to fit the budget.
+    """
+    original_tokens: int
+    compact_tokens: int
+    saved_tokens: int
+    dropped_sections: list[str]
+
+
 class SharedState(TypedDict):
     """
     Shared state for the agent.
@@ -24,7 +59,12 @@ class SharedState(TypedDict):
     skills_analysis: SkillAnalysis
     final_decision: Literal['Interview', 'Phone Screen', 'Rejected']
     rejection_reason: str
-    jd_text: str  
-    cv_file_path: str  
+    jd_text: str  # raw JD, only for inputs that have no `jd_id` yet (LangGraph server)
+    jd_id: str  # registered JD (its hash), see src/agent/jd.py
+    cv_hash: str  # SHA-256 of the CV PDF, see src/agent/pdf.py
+    cv_file_path: str  # PDF on the server, only for inputs that have no registered `cv_hash` (LangGraph server)
+    cv_text: str  # raw CV text, likewise
+    cv_compaction: CompactionStats
+    knockout_reason: str  # requirement failed by the local knockout rules, see src/agent/knockouts.py
     
     
\ No newline at end of file
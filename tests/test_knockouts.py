@@ -0,0 +1,131 @@
+from datetime import date
+
+from src.agent.knockouts import evaluate
+
+
+TODAY = date(2026, 1, 1)
+PROFILE = {
+    "title": "Software Engineer",
+    "knockout_criteria": ["Bachelor's degree in Computer Science"],
+    "min_years_experience": 5,
+    "required_skills": [],
+    "nice_to_have_skills": [],
+}
+
+
+def test_high_school_only_fails_degree():
+    cv = """Jane Doe
+jane@example.com
+EXPERIENCE
+Developer, Acme    Jan 2015 - Present
+EDUCATION
+Cairo High School    2010 - 2013
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) == "a bachelor's degree or higher"
+
+
+def test_short_experience_fails_years():
+    cv = """Jane Doe
+EXPERIENCE
+Junior Developer, Acme    Mar 2024 - Present
+EDUCATION
+BSc Computer Science    2019 - 2023
+"""
+    assert evaluate(cv, PROFILE, today=TODAY).startswith("at least 5 years of experience")
+
+
+def test_job_title_with_section_keyword_keeps_later_jobs():
+    cv = """Jane Doe
+EXPERIENCE
+Academic Tutor
+University of Cairo    Jan 2022 - Present
+Software Engineer
+Acme    Jan 2016 - Dec 2021
+Junior Developer
+Beta    Jan 2014 - Dec 2015
+EDUCATION
+BS Computer Science    2010 - 2014
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) is None
+
+
+def test_undotted_bs_and_high_school_line():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2015 - Present
+EDUCATION
+BS Computer Science    2010 - 2014
+Cairo High School    2006 - 2010
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) is None
+
+
+def test_unrecognised_education_line_is_undecided():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2015 - Present
+EDUCATION
+Cairo University    2010 - 2014
+Cairo High School    2006 - 2010
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) is None
+
+
+def test_dates_under_guessed_heading_are_undecided():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2024 - Present
+ACADEMIC TUTOR
+University of Cairo    Jan 2014 - Dec 2023
+EDUCATION
+BS Computer Science    2010 - 2014
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) is None
+
+
+def test_degree_under_guessed_heading_is_undecided():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2015 - Present
+EDUCATION
+Cairo High School    2006 - 2010
+RESEARCH INTERESTS:
+MSc thesis on distributed systems
+"""
+    assert evaluate(cv, PROFILE, today=TODAY) is None
+
+
+def test_soft_criterion_is_left_to_the_llm():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2015 - Present
+EDUCATION
+Cairo High School    2006 - 2010
+"""
+    profile = {**PROFILE, "knockout_criteria": ["Bachelor's degree or equivalent experience"]}
+    assert evaluate(cv, profile, today=TODAY) is None
+
+
+def test_state_and_product_abbreviations_are_not_degrees():
+    cv = """Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2012 - Present
+EDUCATION
+BSc Computer Science    2008 - 2012
+"""
+    for criterion in ("Must be located in Boston, MA", "Proficiency in MS Office"):
+        profile = {**PROFILE, "knockout_criteria": [criterion]}
+        assert evaluate(cv, profile, today=TODAY) is None
+
+
+def test_unread_dates_leave_years_undecided():
+    for dates in ("2012/06 - 2023/08", "June 2012 -\nAugust 2023", "Since 2012"):
+        cv = f"""Jane Doe
+EXPERIENCE
+Developer, Acme    Jan 2024 - Present
+Engineer, Beta
+{dates}
+EDUCATION
+BSc Computer Science    2008 - 2012
+"""
+        assert evaluate(cv, PROFILE, today=TODAY) is None